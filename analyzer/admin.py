@@ -1,4 +1,5 @@
 from django.contrib import admin
-from .models import Analysis
+from .models import Analysis, AnalysisJob
 
 admin.site.register(Analysis)
+admin.site.register(AnalysisJob)
@@ -0,0 +1,291 @@
+import math
+import platform
+import random
+import statistics
+import tempfile
+import textwrap
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.test import override_settings
+from docx import Document
+
+from . import nlp_utils
+from .nlp_utils import (
+    Taxonomy, _apply_phrase_placeholders, analyze_texts, compare_skills_by_category, detect_seniority,
+    tokenize_and_normalize,
+)
+from .utils import EXTRACTED_TEXT_CACHE, EXTRACTOR_VERSION, extract_text_any
+
+DOC_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+TAXONOMY_SIZES = (100, 1_000, 10_000, 50_000)
+# pdfminer needs minutes for a megabyte of text, so extraction only runs on the smaller documents.
+EXTRACT_MAX_SIZE = 100_000
+EXTRACT_FORMATS = ("pdf", "docx", "rtf")
+TEXT_STAGES = (
+    "tokenize_and_normalize", "_apply_phrase_placeholders", "detect_seniority",
+    "compare_skills_by_category", "analyze_texts", "analyze_texts_cached",
+)
+STAGES = TEXT_STAGES + ("extract_text_any",)
+CURRENT_TAXONOMY = "current"
+
+_SYLLABLES = (
+    "ka", "lo", "mi", "net", "py", "ra", "so", "tu", "vex", "zen", "dor", "fi", "gra", "hub", "jet", "qu",
+    "bel", "cy", "dax", "el", "fon", "gel", "ix", "jo", "kin", "lux", "mo", "nix", "or", "pel", "ros", "sy",
+)
+_NAME_CONNECTORS = (" ", " ", "-", ".", "/")
+_FILLER = (
+    "we are looking for a senior engineer with 5+ years of experience building scalable systems . "
+    "mentored juniors , owned the roadmap and led greenfield projects . junior intern learning basic "
+    "knowledge , 2-3 years . principal architect with 10+ years . responsibilities include code review"
+).split()
+_SEPARATORS = (" ", " ", " ", ", ", ". ", "\n", " - ", " / ", " (", ") ")
+
+
+def size_label(size: int) -> str:
+    if size >= 1_000_000 and size % 1_000_000 == 0:
+        return f"{size // 1_000_000}MB"
+    if size >= 1_000 and size % 1_000 == 0:
+        return f"{size // 1_000}KB"
+    return f"{size}B"
+
+
+def synthetic_taxonomy(n_aliases: int, seed: int = 0, categories: int = 30) -> Taxonomy:
+    """A taxonomy with about ``n_aliases`` alias entries; half are canonical skills and about half are multi-word."""
+    rng = random.Random(seed)
+    names: set[str] = set()
+
+    def fresh(words: int) -> str:
+        while True:
+            parts = ["".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(words)]
+            name = rng.choice(_NAME_CONNECTORS).join(parts)
+            if name not in names:
+                names.add(name)
+                return name
+
+    raw = {f"category {i}": {"skills": [], "aliases": {}} for i in range(categories)}
+    entries = list(raw.values())
+    skills = []
+    for _ in range(max(1, n_aliases // 2)):
+        entry = rng.choice(entries)
+        skill = fresh(rng.choice((1, 1, 2, 3)))
+        entry["skills"].append(skill)
+        skills.append((skill, entry))
+    for _ in range(n_aliases - len(skills)):
+        skill, entry = rng.choice(skills)
+        entry["aliases"][fresh(rng.choice((1, 2)))] = skill
+    level_signals = nlp_utils._load_json(nlp_utils.LEVEL_SIGNALS_PATH, {})
+    return Taxonomy.from_config(raw, level_signals, f"synthetic-{n_aliases}-{seed}")
+
+
+def synthetic_document(taxonomy: Taxonomy, size: int, seed: int = 0, skill_ratio: float = 0.3) -> str:
+    """Prose-like text of ``size`` characters mixing taxonomy aliases with CV/JD filler."""
+    rng = random.Random(seed)
+    aliases = list(taxonomy.alias_lookup)
+    parts, length = [], 0
+    while length < size:
+        if aliases and rng.random() < skill_ratio:
+            word = rng.choice(aliases)
+            if rng.random() < 0.2:
+                word = word.title()
+        else:
+            word = rng.choice(_FILLER)
+        part = word + rng.choice(_SEPARATORS)
+        parts.append(part)
+        length += len(part)
+    return "".join(parts)[:size]
+
+
+def _wrap_lines(text: str, width: int = 90) -> list[str]:
+    return [line for para in text.splitlines() for line in (textwrap.wrap(para, width) or [""])]
+
+
+def write_pdf(path: Path, text: str, lines_per_page: int = 60):
+    # Smallest valid PDF pdfminer will read: Helvetica text, one content stream per page.
+    lines = _wrap_lines(text)
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(len(pages)))
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, page_lines in enumerate(pages):
+        shown = " ".join(
+            "(" + line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ") '" for line in page_lines
+        )
+        stream = f"BT /F1 10 Tf 12 TL 40 780 Td {shown} ET".encode("latin-1", "replace")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    Path(path).write_bytes(out)
+
+
+def write_docx(path: Path, text: str):
+    doc = Document()
+    for para in text.splitlines():
+        doc.add_paragraph(para)
+    doc.save(str(path))
+
+
+def write_rtf(path: Path, text: str):
+    body = "\\par\n".join(
+        line.replace("\\", "\\\\").replace("{", "\\{").replace("}", "\\}") for line in text.splitlines()
+    )
+    Path(path).write_text("{\\rtf1\\ansi\\deff0{\\fonttbl{\\f0 Helvetica;}}\\f0\\fs20\n" + body + "\n}", "latin-1", "replace")
+
+
+_FIXTURE_WRITERS = {"pdf": write_pdf, "docx": write_docx, "rtf": write_rtf}
+
+
+@contextmanager
+def installed_taxonomy(taxonomy: Taxonomy):
+    """Pin ``taxonomy`` as the current one (no reload checks) for stages that don't take it as an argument."""
+    saved = nlp_utils._taxonomy, nlp_utils._taxonomy_stamp, nlp_utils._taxonomy_next_check
+    nlp_utils._taxonomy, nlp_utils._taxonomy_next_check = taxonomy, math.inf
+    try:
+        yield taxonomy
+    finally:
+        nlp_utils._taxonomy, nlp_utils._taxonomy_stamp, nlp_utils._taxonomy_next_check = saved
+
+
+def measure(func, rounds: int = 5, max_time: float = 2.0) -> dict:
+    """Run ``func`` once to warm caches, then up to ``rounds`` times (fewer once ``max_time`` is spent)."""
+    func()
+    timings: list[float] = []
+    deadline = time.perf_counter() + max_time
+    while len(timings) < rounds:
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+        if time.perf_counter() > deadline:
+            break
+    return {
+        "min": min(timings),
+        "max": max(timings),
+        "mean": statistics.fmean(timings),
+        "median": statistics.median(timings),
+        "stddev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "rounds": len(timings),
+    }
+
+
+def _text_benchmarks(stages, taxonomy: Taxonomy, taxonomy_label, doc_sizes):
+    for size in doc_sizes:
+        cv = synthetic_document(taxonomy, size, seed=size)
+        jd = synthetic_document(taxonomy, size, seed=size + 1)
+        calls = {
+            "tokenize_and_normalize": lambda: tokenize_and_normalize(cv, "en"),
+            "_apply_phrase_placeholders": lambda: _apply_phrase_placeholders(cv),
+            "detect_seniority": lambda: detect_seniority(cv, with_evidence=True),
+            "compare_skills_by_category": lambda: compare_skills_by_category(cv, jd),
+            "analyze_texts": lambda: analyze_texts(cv, jd),
+            # Both profiles come from the in-process tier: what pairing a known CV with a known JD costs.
+            "analyze_texts_cached": lambda: analyze_texts(cv, jd),
+        }
+        for stage in stages:
+            if stage in calls:
+                params = {"aliases": taxonomy_label, "size": size}
+                yield stage, params, f"{stage}[aliases={taxonomy_label},size={size_label(size)}]", calls[stage]
+
+
+def _profile_cache(enabled: bool):
+    # Without this, every round after the warm-up would be a profile cache hit.
+    dummy = {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+    return override_settings(
+        DOCUMENT_PROFILE_CACHE_SIZE=max(settings.DOCUMENT_PROFILE_CACHE_SIZE, 2) if enabled else 0,
+        CACHES={**settings.CACHES, nlp_utils.PROFILE_CACHE: dummy},
+    )
+
+
+def _no_extraction_cache():
+    # The extracted-text cache would turn every round after the first into a lookup.
+    dummy = {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+    return override_settings(CACHES={**settings.CACHES, EXTRACTED_TEXT_CACHE: dummy})
+
+
+def _extract(path: Path):
+    with open(path, "rb") as f:
+        return extract_text_any(UploadedFile(f, name=path.name, size=path.stat().st_size))
+
+
+def run_benchmarks(stages=STAGES, doc_sizes=DOC_SIZES, taxonomy_sizes=TAXONOMY_SIZES, rounds: int = 5,
+                   max_time: float = 2.0, progress=None) -> dict:
+    """Time each stage separately; the result mirrors pytest-benchmark's JSON layout (``benchmarks[].stats``)."""
+    benchmarks = []
+
+    def record(stage, params, name, func):
+        stats = measure(func, rounds, max_time)
+        benchmarks.append({"name": name, "group": stage, "params": params, "stats": stats})
+        if progress:
+            progress(name, stats)
+
+    for n_aliases in taxonomy_sizes:
+        if not set(stages) & set(TEXT_STAGES):
+            break
+        if n_aliases == CURRENT_TAXONOMY:
+            taxonomy = nlp_utils.get_taxonomy()
+            label = CURRENT_TAXONOMY
+        else:
+            taxonomy = synthetic_taxonomy(n_aliases)
+            label = n_aliases
+        with installed_taxonomy(taxonomy):
+            for bench in _text_benchmarks(stages, taxonomy, label, doc_sizes):
+                with _profile_cache(bench[0] == "analyze_texts_cached"):
+                    record(*bench)
+
+    if "extract_text_any" in stages:
+        taxonomy = nlp_utils.get_taxonomy()
+        with tempfile.TemporaryDirectory() as tmp, _no_extraction_cache():
+            for size in (s for s in doc_sizes if s <= EXTRACT_MAX_SIZE):
+                text = synthetic_document(taxonomy, size, seed=size)
+                for fmt in EXTRACT_FORMATS:
+                    path = Path(tmp) / f"fixture-{size}.{fmt}"
+                    _FIXTURE_WRITERS[fmt](path, text)
+                    params = {"format": fmt, "size": size}
+                    record("extract_text_any", params, f"extract_text_any[{fmt},size={size_label(size)}]",
+                           lambda path=path: _extract(path))
+
+    return {
+        "machine_info": {"python": platform.python_version(), "machine": platform.machine(), "node": platform.node()},
+        "versions": {
+            "analyzer": nlp_utils.ANALYZER_VERSION,
+            "taxonomy": nlp_utils.TAXONOMY_VERSION,
+            "extractor": EXTRACTOR_VERSION,
+        },
+        "datetime": datetime.now(timezone.utc).isoformat(),
+        "options": {"rounds": rounds, "max_time": max_time, "extraction_pool_size": settings.EXTRACTION_POOL_SIZE},
+        "benchmarks": benchmarks,
+    }
+
+
+def compare_runs(baseline: dict, current: dict, threshold: float, stat: str = "median") -> tuple[list[dict], list[dict]]:
+    """Rows for benchmarks present in both runs; a stage regresses when ``stat`` grew by more than ``threshold`` %."""
+    before = {b["name"]: b["stats"][stat] for b in baseline.get("benchmarks", [])}
+    rows = []
+    for bench in current.get("benchmarks", []):
+        old = before.get(bench["name"])
+        if old is None:
+            continue
+        new = bench["stats"][stat]
+        change = (new - old) / old * 100.0 if old else 0.0
+        rows.append({"name": bench["name"], "baseline": old, "current": new, "change": change,
+                     "regressed": change > threshold})
+    return rows, [row for row in rows if row["regressed"]]
@@ -0,0 +1,107 @@
+import csv
+import io
+import json
+import zlib
+
+from asgiref.sync import sync_to_async
+
+from .models import Analysis
+
+FORMATS = ("csv", "jsonl")
+CHUNK_SIZE = 500
+# Rows are grouped into blocks of about this many bytes before they're written out (or compressed).
+BLOCK_SIZE = 64 * 1024
+
+COLUMNS = (
+    "id", "user", "created_at", "job_title", "company", "status", "match_percent", "results_version",
+    "matched_keywords", "missing_keywords", "extra_keywords", "category_scores", "cv_skills", "jd_skills",
+)
+# Only what the export writes; the document texts stay in the database.
+_FIELDS = ("pk", "user__username", "created_at", "job_title", "company", "status", "match_percent",
+           "results_version", "results", "cv_skills", "jd_skills")
+
+
+def export_queryset(user=None):
+    qs = Analysis.objects.all() if user is None else Analysis.objects.filter(user=user)
+    return qs.order_by("created_at", "pk").values_list(*_FIELDS)
+
+
+def _records(queryset, chunk_size: int):
+    # Results are exported as stored, whatever version computed them; re-running the analyzer for
+    # every row is exactly what the export is meant to avoid.
+    for pk, username, created_at, job_title, company, status, match_percent, version, results, cv_skills, jd_skills \
+            in queryset.iterator(chunk_size=chunk_size):
+        results = results or {}
+        yield {
+            "id": pk,
+            "user": username,
+            "created_at": created_at.isoformat(),
+            "job_title": job_title or "",
+            "company": company or "",
+            "status": status,
+            "match_percent": match_percent,
+            "results_version": version,
+            "matched_keywords": results.get("matched_keywords", []),
+            "missing_keywords": results.get("missing_keywords", []),
+            "extra_keywords": results.get("extra_keywords", []),
+            "category_scores": results.get("category_scores", {}),
+            "cv_skills": cv_skills or [],
+            "jd_skills": jd_skills or [],
+        }
+
+
+def _csv_lines(records):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    for record in records:
+        writer.writerow([
+            "; ".join(value) if isinstance(value, list)
+            else json.dumps(value, sort_keys=True) if isinstance(value, dict)
+            else "" if value is None else value
+            for value in (record[column] for column in COLUMNS)
+        ])
+        if buffer.tell() >= BLOCK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _jsonl_lines(records):
+    block, size = [], 0
+    for record in records:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        block.append(line)
+        size += len(line)
+        if size >= BLOCK_SIZE:
+            yield "".join(block)
+            block, size = [], 0
+    yield "".join(block)
+
+
+def _gzip(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_chunks(queryset, fmt: str = "csv", compress: bool = False, chunk_size: int = CHUNK_SIZE):
+    """Yield the export as bytes blocks. Rows are fetched ``chunk_size`` at a time, so memory stays flat
+    however many analyses there are."""
+    lines = (_csv_lines if fmt == "csv" else _jsonl_lines)(_records(queryset, chunk_size))
+    chunks = (block.encode() for block in lines if block)
+    return _gzip(chunks) if compress else chunks
+
+
+async def aiterate(chunks):
+    """Serve a sync generator from an async response without buffering it.
+
+    Every step runs on the same thread, which holds the DB cursor.
+    """
+    iterator = iter(chunks)
+    while (chunk := await sync_to_async(next)(iterator, None)) is not None:
+        yield chunk
@@ -55,6 +55,59 @@ class AnalyzeUploadForm(forms.Form):
         return cleaned
 
 
+class MultipleFileInput(forms.ClearableFileInput):
+    allow_multiple_selected = True
+
+
+class MultipleFileField(forms.FileField):
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("widget", MultipleFileInput())
+        super().__init__(*args, **kwargs)
+
+    def clean(self, data, initial=None):
+        single_file_clean = super().clean
+        if isinstance(data, (list, tuple)):
+            return [single_file_clean(d, initial) for d in data]
+        return [single_file_clean(data, initial)] if data else []
+
+
+class RankForm(forms.Form):
+    MODE_CV = "cv"
+    MODE_JD = "jd"
+
+    mode = forms.ChoiceField(
+        label="Rank",
+        choices=[
+            (MODE_CV, "One CV against many job descriptions"),
+            (MODE_JD, "One job description against many CVs"),
+        ],
+        initial=MODE_CV,
+        widget=forms.RadioSelect,
+    )
+    query = forms.FileField(label="CV or job description (PDF/DOCX/RTF/TXT)", required=False)
+    query_text = forms.CharField(
+        label="Or paste it here",
+        widget=forms.Textarea(attrs={"rows": 6}),
+        required=False,
+    )
+    candidates = MultipleFileField(label="Documents to rank against")
+    top_k = forms.IntegerField(
+        label="Show top",
+        min_value=1,
+        max_value=100,
+        initial=10,
+        widget=forms.NumberInput(attrs={"class": "form-control"}),
+    )
+
+    def clean(self):
+        cleaned = super().clean()
+        query_text = (cleaned.get("query_text") or "").strip()
+        cleaned["query_text"] = query_text
+        if not (cleaned.get("query") or query_text):
+            raise forms.ValidationError("You must provide the document to rank, as a file or as text.")
+        return cleaned
+
+
 class CustomRegisterForm(UserCreationForm):
     email = forms.EmailField(required=True)
 
@@ -0,0 +1,49 @@
+from datetime import datetime
+
+from django.db.models import Q
+from django.template.defaultfilters import date as date_filter
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+from django.utils.timezone import is_naive, localtime
+
+from .models import Analysis
+
+PAGE_SIZE = 20
+# Everything the history cards render; the text and results columns stay in the database.
+LIST_FIELDS = ("pk", "job_title", "company", "cv_file", "jd_file", "cv_filename", "jd_filename", "status", "match_percent",
+               "created_at")
+
+
+def encode_cursor(analysis: Analysis) -> str:
+    return urlsafe_base64_encode(f"{analysis.created_at.isoformat()}|{analysis.pk}".encode())
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int] | None:
+    try:
+        created_at, pk = urlsafe_base64_decode(cursor).decode().split("|")
+        created_at, pk = datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+    # encode_cursor always writes an aware datetime; a naive one can't be compared or localized.
+    return None if is_naive(created_at) else (created_at, pk)
+
+
+def history_page(user, cursor: str | None = None, page_size: int = PAGE_SIZE):
+    """Return (analyses, next_cursor), newest first. Pages are keyed on (created_at, pk), which the
+    (user, created_at, id) index serves directly however deep the page is."""
+    qs = Analysis.objects.filter(user=user).only(*LIST_FIELDS)
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        created_at, pk = position
+        qs = qs.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+    page = list(qs.order_by("-created_at", "-pk")[:page_size + 1])
+    next_cursor = encode_cursor(page[page_size - 1]) if len(page) > page_size else None
+    page = page[:page_size]
+
+    # Month headers continue across pages: the first row only gets one if its month differs
+    # from the last row of the previous page.
+    previous = date_filter(localtime(position[0]), "F Y") if position else None
+    for analysis in page:
+        month = date_filter(localtime(analysis.created_at), "F Y")
+        analysis.month_header = month if month != previous else None
+        previous = month
+    return page, next_cursor
@@ -0,0 +1,220 @@
+import csv
+import hashlib
+import json
+import multiprocessing
+import signal
+import time
+import zipfile
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple
+
+import django
+from django.conf import settings
+from django.db import connections, transaction
+
+from .models import Analysis, AnalysisStatus, DocumentSkill
+from .nlp_utils import analyze_texts
+from .utils import ExtractionError, _extract_source, _limit_worker_memory, _limits
+
+BATCH_SIZE = 200
+# Per worker process; a JD shared by many CVs is extracted once per worker, not once per pair.
+DOCUMENT_CACHE_SIZE = 256
+
+
+class ImportRow(NamedTuple):
+    key: str
+    cv: str
+    jd: str
+    job_title: str = ""
+    company: str = ""
+
+
+def _import_key(record: dict) -> str:
+    key = record.get("id", "")
+    if key and len(key) <= 64:
+        return key
+    return hashlib.sha256(f"{key}\0{record['cv']}\0{record['jd']}".encode()).hexdigest()
+
+
+def _numbered_records(path: Path):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if path.suffix.lower() in (".jsonl", ".ndjson"):
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as exc:
+                    raise ValueError(f"line {line_no}: {exc}")
+                if not isinstance(record, dict):
+                    raise ValueError(f"line {line_no}: expected a JSON object")
+                yield line_no, record
+        else:
+            reader = csv.DictReader(f)
+            for record in reader:
+                yield reader.line_num, record
+
+
+def read_manifest(path) -> list[ImportRow]:
+    """Read a CSV (with a header row) or JSONL manifest of ``cv`` and ``jd`` paths, with optional ``id``,
+    ``job_title`` and ``company``. Rows without an ``id`` are keyed on their file pair."""
+    path = Path(path)
+    rows, seen = [], set()
+    for line_no, record in _numbered_records(path):
+        record = {k.strip().lower(): "" if v is None else str(v).strip() for k, v in record.items() if k}
+        if not record.get("cv") or not record.get("jd"):
+            raise ValueError(f"line {line_no}: needs both a 'cv' and a 'jd' path")
+        key = _import_key(record)
+        if key in seen:
+            raise ValueError(f"line {line_no}: the same pair (or id) appears twice")
+        seen.add(key)
+        rows.append(ImportRow(key, record["cv"], record["jd"],
+                              record.get("job_title", "")[:255], record.get("company", "")[:255]))
+    return rows
+
+
+class _Timeout(Exception):
+    pass
+
+
+def _raise_timeout(signum, frame):
+    raise _Timeout
+
+
+# Set per process by _init_worker.
+_source = None
+_timeout = 0.0
+
+
+def _init_worker(source: str, timeout: float, max_memory_mb: int, setup: bool = True):
+    global _source, _timeout
+    if setup:
+        django.setup()
+    _limit_worker_memory(max_memory_mb)
+    path = Path(source)
+    _source = zipfile.ZipFile(path) if path.is_file() else path.resolve()
+    _timeout = timeout if hasattr(signal, "setitimer") else 0
+    if _timeout:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+    _document_text.cache_clear()
+
+
+def _document_source(name: str):
+    if isinstance(_source, zipfile.ZipFile):
+        try:
+            return _source.read(name)
+        except KeyError:
+            raise ExtractionError(f"{name} is not in the archive.")
+    path = (_source / name).resolve()
+    if not path.is_relative_to(_source) or not path.is_file():
+        raise ExtractionError(f"{name} does not exist.")
+    return str(path)
+
+
+@lru_cache(maxsize=DOCUMENT_CACHE_SIZE)
+def _document_text(name: str) -> str:
+    source = _document_source(name)
+    max_pages, max_chars = _limits()
+    # A hung parser only stops the pair it's working on; the worker moves on to the next one.
+    if _timeout:
+        signal.setitimer(signal.ITIMER_REAL, _timeout)
+    try:
+        return _extract_source(name.lower(), source, max_pages, max_chars)
+    except _Timeout:
+        raise ExtractionError(f"{name} took too long to process.", "timeout")
+    except MemoryError:
+        raise ExtractionError(f"{name} is too large to process.", "too_large")
+    except ExtractionError:
+        raise
+    except Exception as exc:
+        raise ExtractionError(f"{name} couldn't be read ({type(exc).__name__}).") from exc
+    finally:
+        if _timeout:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def _process_row(row: ImportRow) -> tuple[ImportRow, str, str, dict | None, str]:
+    """Runs in a worker: returns (row, cv_text, jd_text, results, error)."""
+    try:
+        cv_text, jd_text = _document_text(row.cv), _document_text(row.jd)
+        return row, cv_text, jd_text, analyze_texts(cv_text, jd_text), ""
+    except ExtractionError as exc:
+        return row, "", "", None, str(exc)
+    except Exception as exc:
+        return row, "", "", None, f"Analysis failed ({type(exc).__name__}: {exc})."
+
+
+def _write_batch(user, batch: list[tuple]) -> int:
+    analyses, failed = [], 0
+    for row, cv_text, jd_text, results, error in batch:
+        analysis = Analysis(user=user, import_key=row.key, job_title=row.job_title, company=row.company,
+                            cv_text=cv_text, jd_text=jd_text)
+        if results is None:
+            analysis.status, analysis.error = AnalysisStatus.FAILED, error
+            failed += 1
+        else:
+            analysis.set_results(results)
+        analyses.append(analysis)
+    # Rows and their import keys commit together, so a crash never leaves a pair half-written.
+    with transaction.atomic():
+        # A failed pair that is being retried replaces its earlier attempt.
+        Analysis.objects.filter(user=user, status=AnalysisStatus.FAILED,
+                                import_key__in=[row.key for row, *_ in batch]).delete()
+        Analysis.objects.bulk_create(analyses, batch_size=BATCH_SIZE)
+        if not DocumentSkill.uses_native_index():
+            DocumentSkill.objects.bulk_create(
+                [skill for analysis in analyses for skill in DocumentSkill.rows_for(analysis)], batch_size=1000,
+            )
+    return failed
+
+
+def pending_rows(user, rows: list[ImportRow], retry_failed: bool = False) -> list[ImportRow]:
+    """The rows not imported yet. Failed pairs count as imported unless ``retry_failed`` is set."""
+    done = Analysis.objects.filter(user=user, import_key__isnull=False)
+    if retry_failed:
+        done = done.exclude(status=AnalysisStatus.FAILED)
+    done = set(done.values_list("import_key", flat=True))
+    return [row for row in rows if row.key not in done]
+
+
+def run_import(user, source, rows: list[ImportRow], processes: int = 1, batch_size: int = BATCH_SIZE,
+               progress=None) -> dict:
+    """Extract, analyze and store ``rows`` (already filtered by pending_rows) as analyses of ``user``.
+
+    ``source`` is a directory or zip the manifest paths are relative to. Rows are written with
+    bulk_create every ``batch_size`` pairs; ``progress(stats)`` is called after each batch.
+    """
+    stats = {"total": len(rows), "done": 0, "failed": 0, "elapsed": 0.0}
+    started = time.perf_counter()
+    init_args = (str(source), settings.EXTRACTION_TIMEOUT, settings.EXTRACTION_MAX_MEMORY_MB)
+
+    def flush(batch):
+        stats["failed"] += _write_batch(user, batch)
+        stats["done"] += len(batch)
+        stats["elapsed"] = time.perf_counter() - started
+        if progress:
+            progress(dict(stats))
+
+    def consume(results):
+        batch = []
+        for result in results:
+            batch.append(result)
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+
+    if processes <= 1:
+        _init_worker(*init_args, setup=False)
+        consume(map(_process_row, rows))
+    else:
+        # Workers must not share the parent's DB connection.
+        connections.close_all()
+        chunksize = max(1, min(16, len(rows) // (processes * 4)))
+        with multiprocessing.Pool(processes, initializer=_init_worker, initargs=init_args,
+                                  maxtasksperchild=1000) as pool:
+            consume(pool.imap_unordered(_process_row, rows, chunksize))
+    stats["elapsed"] = time.perf_counter() - started
+    return stats
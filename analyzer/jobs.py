@@ -0,0 +1,98 @@
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import Analysis, AnalysisJob, AnalysisStatus, DocumentSkill
+from .nlp_utils import analyze_texts
+from .utils import ExtractionError, extract_text_any
+
+MAX_ATTEMPTS = 3
+STALE_AFTER = timedelta(minutes=10)
+# Written back when a job finishes. The user may have deleted the analysis in the meantime, so results are
+# stored with update(): save() would insert the row again, and save(update_fields=...) would raise.
+_RESULT_FIELDS = ("cv_text", "jd_text", "results", "results_version", "match_percent", "cv_keywords", "jd_keywords",
+                  "cv_skills", "jd_skills", "status", "error")
+
+
+def enqueue_analysis(analysis: Analysis) -> AnalysisJob:
+    return AnalysisJob.objects.create(analysis=analysis)
+
+
+def _claimable(now) -> Q:
+    # Running jobs whose worker died are picked up again once their lock goes stale.
+    return Q(status=AnalysisStatus.PENDING) | Q(status=AnalysisStatus.RUNNING, locked_at__lt=now - STALE_AFTER)
+
+
+def claim_next_job(worker_id: str, batch: int = 10) -> AnalysisJob | None:
+    now = timezone.now()
+    candidates = list(
+        AnalysisJob.objects.filter(_claimable(now)).order_by("created_at").values_list("pk", flat=True)[:batch]
+    )
+    for pk in candidates:
+        claimed = AnalysisJob.objects.filter(_claimable(now), pk=pk).update(
+            status=AnalysisStatus.RUNNING,
+            worker=worker_id,
+            locked_at=now,
+            attempts=F("attempts") + 1,
+        )
+        if claimed:
+            return AnalysisJob.objects.select_related("analysis").get(pk=pk)
+    return None
+
+
+def _extract_stored(field_file) -> str:
+    with field_file.open("rb") as f:
+        return extract_text_any(f)
+
+
+def run_analysis(analysis: Analysis):
+    if not analysis.cv_text and analysis.cv_file:
+        analysis.cv_text = _extract_stored(analysis.cv_file)
+    if not analysis.jd_text and analysis.jd_file:
+        analysis.jd_text = _extract_stored(analysis.jd_file)
+    analysis.set_results(analyze_texts(analysis.cv_text, analysis.jd_text))
+    analysis.status = AnalysisStatus.DONE
+    analysis.error = ""
+
+
+def process_job(job: AnalysisJob):
+    analysis = job.analysis
+    if job.attempts > MAX_ATTEMPTS:
+        _fail(job, job.last_error or "Gave up after too many attempts.")
+        return
+    Analysis.objects.filter(pk=analysis.pk).update(status=AnalysisStatus.RUNNING)
+    try:
+        run_analysis(analysis)
+    except ExtractionError as exc:
+        # Bad input won't get better on retry.
+        _fail(job, str(exc), user_message=str(exc))
+        return
+    except Exception as exc:
+        job.last_error = f"{type(exc).__name__}: {exc}"
+        if job.attempts >= MAX_ATTEMPTS:
+            _fail(job, job.last_error)
+        else:
+            AnalysisJob.objects.filter(pk=job.pk).update(
+                status=AnalysisStatus.PENDING, last_error=job.last_error, updated_at=timezone.now(),
+            )
+            Analysis.objects.filter(pk=analysis.pk).update(status=AnalysisStatus.PENDING)
+        return
+    with transaction.atomic():
+        now = timezone.now()
+        written = Analysis.objects.filter(pk=analysis.pk).update(
+            updated_at=now, **{name: getattr(analysis, name) for name in _RESULT_FIELDS},
+        )
+        if written:
+            DocumentSkill.sync(analysis)
+            AnalysisJob.objects.filter(pk=job.pk).update(status=AnalysisStatus.DONE, updated_at=now)
+
+
+def _fail(job: AnalysisJob, message: str, user_message: str = ""):
+    with transaction.atomic():
+        AnalysisJob.objects.filter(pk=job.pk).update(
+            status=AnalysisStatus.FAILED, last_error=message, updated_at=timezone.now(),
+        )
+        Analysis.objects.filter(pk=job.analysis_id).update(
+            status=AnalysisStatus.FAILED,
+            error=user_message or "We couldn't process these documents. Please try uploading them again.",
+        )
@@ -0,0 +1,286 @@
+import http.client
+import random
+import re
+import ssl
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from http.cookies import SimpleCookie
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+from . import nlp_utils
+from .benchmarks import _FIXTURE_WRITERS, synthetic_document
+
+ENDPOINTS = ("upload", "detail", "history")
+DEFAULT_MIX = {"upload": 2, "detail": 5, "history": 3}
+UPLOAD_FORMATS = ("pdf", "docx", "rtf", "text")
+DOCUMENTS_PER_FORMAT = 4
+_CONTENT_TYPES = {
+    "pdf": "application/pdf",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "rtf": "application/rtf",
+}
+_DETAIL_RE = re.compile(r"/analysis/(\d+)/")
+
+
+class LoadTestError(Exception):
+    pass
+
+
+def build_documents(size: int, formats=UPLOAD_FORMATS, per_format: int = DOCUMENTS_PER_FORMAT) -> dict[str, list]:
+    """Synthetic CVs and JDs per format: ``(filename, bytes)`` for files, the text itself for ``text``."""
+    taxonomy = nlp_utils.get_taxonomy()
+    documents: dict[str, list] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in formats:
+            documents[fmt] = []
+            for i in range(per_format):
+                text = synthetic_document(taxonomy, size, seed=len(documents) * 100 + i)
+                if fmt == "text":
+                    documents[fmt].append(text)
+                    continue
+                path = Path(tmp) / f"document-{i}.{fmt}"
+                _FIXTURE_WRITERS[fmt](path, text)
+                documents[fmt].append((path.name, path.read_bytes()))
+    return documents
+
+
+def _multipart(fields: dict[str, str], files: dict[str, tuple[str, bytes]]) -> tuple[bytes, str]:
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, (filename, data) in files.items():
+        content_type = _CONTENT_TYPES.get(filename.rsplit(".", 1)[-1], "application/octet-stream")
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n".encode() + data + b"\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+class Session:
+    """One virtual user: a keep-alive connection plus the session and CSRF cookies."""
+
+    def __init__(self, base_url: str, timeout: float = 60.0, verify: bool = True):
+        url = urlsplit(base_url)
+        if url.scheme not in ("http", "https"):
+            raise LoadTestError(f"Unsupported URL {base_url!r}.")
+        self.origin = f"{url.scheme}://{url.netloc}"
+        self.prefix = url.path.rstrip("/")
+        if url.scheme == "https":
+            context = None if verify else ssl._create_unverified_context()
+            self.conn = http.client.HTTPSConnection(url.hostname, url.port, timeout=timeout, context=context)
+        else:
+            self.conn = http.client.HTTPConnection(url.hostname, url.port, timeout=timeout)
+        self.cookies: dict[str, str] = {}
+
+    def request(self, method: str, path: str, body: bytes | None = None, headers: dict | None = None):
+        """Return (status, response headers, body, seconds). Redirects are not followed."""
+        headers = {"Host": self.conn.host if self.conn.port is None else f"{self.conn.host}:{self.conn.port}",
+                   **(headers or {})}
+        if self.cookies:
+            headers["Cookie"] = "; ".join(f"{k}={v}" for k, v in self.cookies.items())
+        if method == "POST":
+            headers.update({"Origin": self.origin, "Referer": self.origin + self.prefix + path,
+                            "X-CSRFToken": self.cookies.get("csrftoken", "")})
+        for attempt in (1, 2):
+            started = time.perf_counter()
+            try:
+                self.conn.request(method, self.prefix + path, body=body, headers=headers)
+                response = self.conn.getresponse()
+                data = response.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # The server closed an idle keep-alive connection; reconnect once.
+                self.conn.close()
+                if attempt == 2:
+                    raise
+                continue
+            except Exception:
+                # A timeout or other failure leaves the connection mid-request, where it would refuse every
+                # later one; the next request opens a fresh one.
+                self.conn.close()
+                raise
+            elapsed = time.perf_counter() - started
+            if response.version < 11 or (response.getheader("Connection") or "").lower() == "close":
+                self.conn.close()
+            for header in response.headers.get_all("Set-Cookie") or []:
+                for name, morsel in SimpleCookie(header).items():
+                    self.cookies[name] = morsel.value
+            return response.status, response.headers, data, elapsed
+
+    def login(self, login_path: str, username: str, password: str):
+        self.request("GET", login_path)
+        if "csrftoken" not in self.cookies:
+            raise LoadTestError(f"GET {login_path} set no csrftoken cookie.")
+        body = urlencode({"csrfmiddlewaretoken": self.cookies["csrftoken"], "username": username,
+                          "password": password}).encode()
+        status, headers, _, _ = self.request(
+            "POST", login_path, body, {"Content-Type": "application/x-www-form-urlencoded"},
+        )
+        if status != 302 or "sessionid" not in self.cookies:
+            raise LoadTestError(f"Login as {username!r} failed (HTTP {status}).")
+
+    def close(self):
+        self.conn.close()
+
+
+def _server_timing(header: str | None) -> dict[str, float]:
+    timings: dict[str, float] = {}
+    for entry in (header or "").split(","):
+        name, _, rest = entry.strip().partition(";")
+        if name and rest.startswith("dur="):
+            try:
+                timings[name] = timings.get(name, 0.0) + float(rest[4:])
+            except ValueError:
+                pass
+    return timings
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.failed: Counter = Counter()
+        self.errors: dict[str, Counter] = defaultdict(Counter)
+        self.server: dict[str, Counter] = defaultdict(Counter)
+        self.issued = 0
+        self.started = self.finished = 0.0
+
+    def claim(self, limit: int) -> bool:
+        """Reserve one request, so ``limit`` is exact however many clients race for the last one."""
+        with self.lock:
+            if limit and self.issued >= limit:
+                return False
+            self.issued += 1
+            return True
+
+    def record(self, endpoint: str, seconds: float | None, error: str | None = None,
+               server_timing: dict | None = None):
+        """``seconds`` is None when no response came back: that counts as a request and an error, but has
+        no latency to put in the percentiles."""
+        with self.lock:
+            if seconds is None:
+                self.failed[endpoint] += 1
+            else:
+                self.latencies[endpoint].append(seconds)
+            if error:
+                self.errors[endpoint][error] += 1
+            for name, ms in (server_timing or {}).items():
+                self.server[endpoint][name] += ms
+
+
+def _percentile(ordered: list[float], pct: float) -> float:
+    # Nearest rank, so p99 of a short run is an observed latency rather than an interpolation.
+    return ordered[min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))]
+
+
+def summarize(recorder: Recorder) -> dict:
+    elapsed = max(recorder.finished - recorder.started, 1e-9)
+    endpoints = {}
+    for endpoint in sorted(set(recorder.latencies) | set(recorder.failed)):
+        # Latencies are over the requests that got a response; the rest only count as errors.
+        ordered = sorted(recorder.latencies[endpoint])
+        count = len(ordered) + recorder.failed[endpoint]
+        endpoints[endpoint] = {
+            "requests": count,
+            "errors": sum(recorder.errors[endpoint].values()),
+            "error_kinds": dict(recorder.errors[endpoint]),
+            "throughput": count / elapsed,
+            "mean": sum(ordered) / len(ordered) if ordered else None,
+            "p50": _percentile(ordered, 50) if ordered else None,
+            "p95": _percentile(ordered, 95) if ordered else None,
+            "p99": _percentile(ordered, 99) if ordered else None,
+            "max": ordered[-1] if ordered else None,
+            "server_timing_mean_ms": {k: v / len(ordered) for k, v in sorted(recorder.server[endpoint].items())},
+        }
+    total = sum(e["requests"] for e in endpoints.values())
+    return {
+        "elapsed": elapsed,
+        "requests": total,
+        "errors": sum(e["errors"] for e in endpoints.values()),
+        "throughput": total / elapsed,
+        "endpoints": endpoints,
+    }
+
+
+def _client_loop(session: Session, paths: dict, documents: dict, mix: dict[str, int], recorder: Recorder,
+                 deadline: float, max_requests: int, seed: int):
+    rng = random.Random(seed)
+    endpoints, weights = list(mix), list(mix.values())
+    formats = list(documents)
+    analyses: list[int] = []
+    n = 0
+    while time.monotonic() < deadline and recorder.claim(max_requests):
+        endpoint = rng.choices(endpoints, weights)[0]
+        if endpoint == "detail" and not analyses:
+            endpoint = "upload"
+        n += 1
+        try:
+            if endpoint == "upload":
+                fields, files = {"job_title": f"Load test {n}", "company": "Load test"}, {}
+                for field in ("cv", "jd"):
+                    fmt = rng.choice(formats)
+                    document = rng.choice(documents[fmt])
+                    if fmt == "text":
+                        fields[f"{field}_text"] = document
+                    else:
+                        files[field] = document
+                fields["csrfmiddlewaretoken"] = session.cookies.get("csrftoken", "")
+                body, content_type = _multipart(fields, files)
+                status, headers, _, seconds = session.request("POST", paths["home"], body,
+                                                              {"Content-Type": content_type})
+                match = _DETAIL_RE.search(headers.get("Location") or "")
+                if status == 302 and match:
+                    analyses.append(int(match.group(1)))
+                    error = None
+                else:
+                    error = "form errors" if status == 200 else f"HTTP {status}"
+            else:
+                path = (paths["detail"].format(pk=rng.choice(analyses)) if endpoint == "detail"
+                        else paths["history"])
+                status, headers, _, seconds = session.request("GET", path)
+                error = None if status == 200 else f"HTTP {status}"
+        except (OSError, http.client.HTTPException) as exc:
+            recorder.record(endpoint, None, type(exc).__name__)
+            continue
+        recorder.record(endpoint, seconds, error, _server_timing(headers.get("Server-Timing")))
+
+
+def run_load_test(base_url: str, paths: dict, username: str, password: str, clients: int = 4,
+                  duration: float = 30.0, max_requests: int = 0, mix: dict[str, int] | None = None,
+                  documents: dict | None = None, timeout: float = 60.0, verify: bool = True) -> dict:
+    """Log ``clients`` sessions in and replay the request ``mix`` until ``duration`` runs out (or
+    ``max_requests`` are done), then summarize latency per endpoint.
+
+    ``paths`` maps ``login``, ``home``, ``history`` and ``detail`` (with ``{pk}``) to URL paths.
+    """
+    mix = {k: v for k, v in (mix or DEFAULT_MIX).items() if v > 0}
+    documents = documents or build_documents(5_000)
+    sessions = []
+    try:
+        for _ in range(clients):
+            session = Session(base_url, timeout, verify)
+            sessions.append(session)
+            session.login(paths["login"], username, password)
+        recorder = Recorder()
+        recorder.started = time.perf_counter()
+        deadline = time.monotonic() + duration
+        threads = [
+            threading.Thread(target=_client_loop, name=f"loadtest-{i}", daemon=True,
+                             args=(session, paths, documents, mix, recorder, deadline, max_requests, i))
+            for i, session in enumerate(sessions)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        recorder.finished = time.perf_counter()
+    finally:
+        for session in sessions:
+            session.close()
+    return summarize(recorder)
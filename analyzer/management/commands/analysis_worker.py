@@ -0,0 +1,69 @@
+import logging
+import multiprocessing
+import os
+import socket
+import time
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+logger = logging.getLogger(__name__)
+
+
+def _work(worker_id: str, poll_interval: float, once: bool):
+    django.setup()
+    from analyzer.jobs import claim_next_job, process_job
+
+    while True:
+        close_old_connections()
+        try:
+            job = claim_next_job(worker_id)
+            if job is not None:
+                process_job(job)
+                continue
+        except Exception:
+            # One bad job (or a lost DB connection) must not take the worker down; with --processes
+            # nothing respawns it. A job that was claimed is retried once its lock goes stale.
+            logger.exception("Worker %s failed while claiming or processing a job.", worker_id)
+        if once:
+            return
+        time.sleep(poll_interval)
+
+
+class Command(BaseCommand):
+    help = "Process queued analyses (upload -> extract -> analyze) in one or more worker processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=1, help="Number of worker processes.")
+        parser.add_argument("--poll-interval", type=float, default=2.0, help="Seconds to sleep when the queue is empty.")
+        parser.add_argument("--once", action="store_true", help="Exit once the queue is drained.")
+
+    def handle(self, *args, **options):
+        processes = max(1, options["processes"])
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+        poll, once = options["poll_interval"], options["once"]
+
+        if processes == 1:
+            self.stdout.write(f"Worker {prefix} started.")
+            _work(prefix, poll, once)
+            return
+
+        # Children must open their own DB connections. They aren't daemonic, because a daemonic process
+        # can't start the extraction pool; the parent waits for them and terminates them on Ctrl-C.
+        connections.close_all()
+        workers = [
+            multiprocessing.Process(target=_work, args=(f"{prefix}/{i}", poll, once))
+            for i in range(processes)
+        ]
+        for w in workers:
+            w.start()
+        self.stdout.write(f"Started {processes} workers ({prefix}).")
+        try:
+            for w in workers:
+                w.join()
+        except KeyboardInterrupt:
+            for w in workers:
+                w.terminate()
+            for w in workers:
+                w.join()
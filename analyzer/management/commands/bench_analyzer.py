@@ -0,0 +1,92 @@
+import json
+import re
+import sys
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from analyzer.benchmarks import (
+    CURRENT_TAXONOMY, DOC_SIZES, STAGES, TAXONOMY_SIZES, compare_runs, run_benchmarks, size_label,
+)
+
+
+_SIZE_RE = re.compile(r"(\d+)\s*([KM]?)B?", re.IGNORECASE)
+_SCALES = {"": 1, "K": 1_000, "M": 1_000_000}
+
+
+def _int_list(raw: str) -> list[int]:
+    """Parse ``1KB,10k,1MB,500`` into ints; anything but a number with an optional K/M(B) suffix is rejected."""
+    values = []
+    for item in raw.split(","):
+        match = _SIZE_RE.fullmatch(item.strip())
+        if not match:
+            raise ValueError(f"Invalid size {item.strip()!r}; use e.g. 500, 10KB or 1MB.")
+        values.append(int(match.group(1)) * _SCALES[match.group(2).upper()])
+    return values
+
+
+class Command(BaseCommand):
+    help = ("Time the analyzer stages on synthetic corpora and taxonomies, write the results as JSON "
+            "and optionally fail when a stage regressed against a baseline run.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--stages", default=",".join(STAGES), help="Comma-separated stages to run.")
+        parser.add_argument("--sizes", default=",".join(size_label(s) for s in DOC_SIZES),
+                            help="Document sizes, e.g. 1KB,10KB,1MB.")
+        parser.add_argument("--taxonomy-sizes", default=",".join(map(str, TAXONOMY_SIZES)),
+                            help=f"Synthetic taxonomy sizes in aliases; '{CURRENT_TAXONOMY}' uses the configured one.")
+        parser.add_argument("--rounds", type=int, default=5, help="Timed rounds per benchmark (after one warm-up).")
+        parser.add_argument("--max-time", type=float, default=2.0, help="Stop adding rounds after this many seconds.")
+        parser.add_argument("--output", help="Write the JSON results here instead of stdout.")
+        parser.add_argument("--compare", help="Baseline JSON from an earlier run.")
+        parser.add_argument("--threshold", type=float, default=10.0, help="Allowed slowdown in percent.")
+        parser.add_argument("--compare-stat", default="median", choices=("min", "median", "mean"))
+
+    def handle(self, *args, **options):
+        stages = [s.strip() for s in options["stages"].split(",") if s.strip()]
+        unknown = set(stages) - set(STAGES)
+        if unknown:
+            raise CommandError(f"Unknown stages: {', '.join(sorted(unknown))}. Choose from {', '.join(STAGES)}.")
+        try:
+            sizes = _int_list(options["sizes"])
+            taxonomy_sizes = [
+                CURRENT_TAXONOMY if s.strip() == CURRENT_TAXONOMY else int(s)
+                for s in options["taxonomy_sizes"].split(",")
+            ]
+        except ValueError as exc:
+            raise CommandError(f"Bad size: {exc}")
+
+        baseline = None
+        if options["compare"]:
+            try:
+                baseline = json.loads(Path(options["compare"]).read_text())
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Can't read baseline {options['compare']}: {exc}")
+
+        # Progress goes to stderr so the JSON on stdout can be piped.
+        def progress(name, stats):
+            self.stderr.write(f"{name:<70} median {stats['median'] * 1000:10.3f} ms  ({stats['rounds']} rounds)")
+
+        results = run_benchmarks(stages, sizes, taxonomy_sizes, options["rounds"], options["max_time"], progress)
+        payload = json.dumps(results, indent=2)
+        if options["output"]:
+            Path(options["output"]).write_text(payload + "\n")
+            self.stderr.write(f"Wrote {options['output']}.")
+        else:
+            sys.stdout.write(payload + "\n")
+
+        if baseline is None:
+            return
+        rows, regressions = compare_runs(baseline, results, options["threshold"], options["compare_stat"])
+        for row in rows:
+            flag = "  REGRESSED" if row["regressed"] else ""
+            self.stderr.write(
+                f"{row['name']:<70} {row['baseline'] * 1000:10.3f} -> {row['current'] * 1000:10.3f} ms "
+                f"{row['change']:+7.1f}%{flag}"
+            )
+        if regressions:
+            raise CommandError(
+                f"{len(regressions)} of {len(rows)} benchmarks regressed more than {options['threshold']}% "
+                f"({options['compare_stat']})."
+            )
+        self.stderr.write(self.style.SUCCESS(f"No regressions across {len(rows)} benchmarks."))
@@ -0,0 +1,50 @@
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from analyzer.nlp_utils import FUZZY_STOPLIST_PATH, LEVEL_SIGNALS_PATH, TAXONOMY_PATH, Taxonomy
+
+
+class Command(BaseCommand):
+    help = "Compile the skills taxonomy and level signals into the artifact that workers load and hot-reload."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--taxonomy", default=str(TAXONOMY_PATH), help="Skills taxonomy JSON.")
+        parser.add_argument("--level-signals", default=str(LEVEL_SIGNALS_PATH), help="Level signals JSON.")
+        parser.add_argument("--fuzzy-stoplist", default=str(FUZZY_STOPLIST_PATH),
+                            help="Words never read as misspelled skills, one per line (optional).")
+        parser.add_argument("--output", default=settings.TAXONOMY_ARTIFACT,
+                            help="Artifact path (defaults to TAXONOMY_ARTIFACT).")
+
+    def handle(self, *args, **options):
+        if not options["output"]:
+            raise CommandError("No output path: pass --output or set TAXONOMY_ARTIFACT.")
+        taxonomy_path, signals_path = Path(options["taxonomy"]), Path(options["level_signals"])
+        output = Path(options["output"])
+        for path in (taxonomy_path, signals_path):
+            if not path.exists():
+                raise CommandError(f"{path} does not exist.")
+
+        # Skills keep their IDs from the previous artifact; new ones are appended.
+        previous_skills = ()
+        if output.exists():
+            try:
+                previous = Taxonomy.load(output)
+            except Exception:
+                previous = None
+            if previous is not None:
+                previous_skills = previous.skills
+
+        started = time.perf_counter()
+        taxonomy = Taxonomy.from_files(taxonomy_path, signals_path, previous_skills, Path(options["fuzzy_stoplist"]))
+        if not taxonomy.skill_to_category:
+            raise CommandError(f"{taxonomy_path} defines no skills.")
+        taxonomy.dump(output)
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {output} (version {taxonomy.version}): {len(taxonomy.skill_to_category)} skills, "
+            f"{len(taxonomy.alias_lookup)} aliases, {len(taxonomy.category_skills)} categories in {elapsed:.2f}s."
+        ))
@@ -0,0 +1,37 @@
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from analyzer.export import CHUNK_SIZE, FORMATS, export_chunks, export_queryset
+
+
+class Command(BaseCommand):
+    help = ("Stream analyses (match percent, keyword lists, category scores) as CSV or JSONL, "
+            "optionally gzip-compressed. Stored results are exported as-is; nothing is re-analysed.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Only this user's analyses (default: everyone's).")
+        parser.add_argument("--format", default="csv", choices=FORMATS)
+        parser.add_argument("--gzip", action="store_true", help="Compress the output.")
+        parser.add_argument("--output", help="Write here instead of stdout.")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Rows fetched per query.")
+
+    def handle(self, *args, **options):
+        user = None
+        if options["user"]:
+            try:
+                user = User.objects.get(username=options["user"])
+            except User.DoesNotExist:
+                raise CommandError(f"No user named {options['user']!r}.")
+
+        chunks = export_chunks(export_queryset(user), options["format"], options["gzip"],
+                               max(1, options["chunk_size"]))
+        if options["output"]:
+            with open(options["output"], "wb") as f:
+                size = sum(f.write(chunk) for chunk in chunks)
+            self.stderr.write(f"Wrote {size:,} bytes to {options['output']}.")
+        else:
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.flush()
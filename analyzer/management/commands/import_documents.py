@@ -0,0 +1,60 @@
+import os
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from analyzer.importer import BATCH_SIZE, pending_rows, read_manifest, run_import
+
+
+class Command(BaseCommand):
+    help = ("Import CV/JD pairs from a directory or zip, as listed in a CSV or JSONL manifest, and store their "
+            "analyses for one user. Re-running the same manifest skips pairs that were already imported.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", help="Directory or .zip holding the documents.")
+        parser.add_argument("manifest", help="CSV or JSONL with cv, jd and optional id, job_title, company.")
+        parser.add_argument("--user", required=True, help="Username the analyses belong to.")
+        parser.add_argument("--processes", type=int, default=os.cpu_count() or 1,
+                            help="Worker processes for extraction and analysis.")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Analyses written per transaction.")
+        parser.add_argument("--retry-failed", action="store_true",
+                            help="Import pairs that failed in an earlier run again, replacing the failed analyses.")
+
+    def handle(self, *args, **options):
+        source = Path(options["source"])
+        if not source.is_dir() and not (source.is_file() and source.suffix.lower() == ".zip"):
+            raise CommandError(f"{source} is neither a directory nor a .zip file.")
+        try:
+            user = User.objects.get(username=options["user"])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named {options['user']!r}.")
+        try:
+            rows = read_manifest(options["manifest"])
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Can't read manifest {options['manifest']}: {exc}")
+
+        pending = pending_rows(user, rows, options["retry_failed"])
+        skipped = len(rows) - len(pending)
+        self.stdout.write(f"{len(rows)} pairs in the manifest, {skipped} already imported, {len(pending)} to go.")
+        if not options["retry_failed"]:
+            failed = len(pending_rows(user, rows, retry_failed=True)) - len(pending)
+            if failed:
+                self.stdout.write(f"{failed} of the imported pairs failed; pass --retry-failed to try them again.")
+        if not pending:
+            return
+
+        def progress(stats):
+            rate = stats["done"] / stats["elapsed"] if stats["elapsed"] else 0.0
+            self.stdout.write(
+                f"{stats['done']:>8}/{stats['total']} pairs  {stats['failed']} failed  "
+                f"{rate:.1f} pairs/s  ({rate * 2 * 3600:,.0f} documents/h)"
+            )
+
+        stats = run_import(user, source, pending, max(1, options["processes"]), max(1, options["batch_size"]),
+                           progress)
+        rate = stats["done"] / stats["elapsed"] if stats["elapsed"] else 0.0
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {stats['done'] - stats['failed']} pairs ({stats['failed']} failed) in {stats['elapsed']:.1f}s: "
+            f"{rate:.1f} pairs/s, {rate * 2 * 3600:,.0f} documents/h."
+        ))
@@ -0,0 +1,116 @@
+import json
+import secrets
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from analyzer.loadtest import (
+    DEFAULT_MIX, ENDPOINTS, UPLOAD_FORMATS, LoadTestError, build_documents, run_load_test,
+)
+
+from .bench_analyzer import _int_list
+
+# Stands in for the pk when reversing the detail URL; unlike 0, it can't also occur in the fixed part.
+DETAIL_SENTINEL = 987654321
+
+
+def _mix(raw: str) -> dict[str, int]:
+    mix = {}
+    for item in raw.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise CommandError(f"Unknown endpoint {name!r} in --mix. Choose from {', '.join(ENDPOINTS)}.")
+        try:
+            mix[name] = int(weight)
+        except ValueError:
+            raise CommandError(f"Bad weight for {name!r} in --mix: {weight!r}.")
+    if not any(mix.values()):
+        raise CommandError("--mix needs at least one positive weight.")
+    return mix
+
+
+class Command(BaseCommand):
+    help = ("Log concurrent clients into a running server and replay a mix of uploads, analysis pages and "
+            "history pages, then report throughput, p50/p95/p99 latency and errors per endpoint.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000", help="Server to load, already running.")
+        parser.add_argument("--clients", type=int, default=4, help="Concurrent clients, each with its own session.")
+        parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run.")
+        parser.add_argument("--requests", type=int, default=0, help="Stop after this many requests (0: no limit).")
+        parser.add_argument("--mix", default=",".join(f"{k}={v}" for k, v in DEFAULT_MIX.items()),
+                            help="Relative weights of upload, detail and history requests.")
+        parser.add_argument("--formats", default=",".join(UPLOAD_FORMATS),
+                            help="Upload formats to pick from; 'text' pastes the document instead.")
+        parser.add_argument("--doc-size", default="5KB", help="Size of the synthetic CVs and JDs, e.g. 5KB.")
+        parser.add_argument("--username", help="Log in as this existing user (default: a temporary one).")
+        parser.add_argument("--password", help="Password for --username.")
+        parser.add_argument("--keep-data", action="store_true",
+                            help="Keep the temporary user and the analyses it uploaded.")
+        parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds.")
+        parser.add_argument("--insecure", action="store_true", help="Don't verify the server's TLS certificate.")
+        parser.add_argument("--output", help="Also write the results as JSON here.")
+
+    def handle(self, *args, **options):
+        mix = _mix(options["mix"])
+        formats = [f.strip() for f in options["formats"].split(",") if f.strip()]
+        unknown = set(formats) - set(UPLOAD_FORMATS)
+        if unknown or not formats:
+            raise CommandError(f"Unknown formats: {', '.join(sorted(unknown))}. Choose from {', '.join(UPLOAD_FORMATS)}.")
+        try:
+            (doc_size,) = _int_list(options["doc_size"])
+        except ValueError as exc:
+            raise CommandError(f"Bad --doc-size: {exc}")
+        if bool(options["username"]) != bool(options["password"]):
+            raise CommandError("--username and --password go together.")
+
+        paths = {
+            "login": reverse("login"),
+            "home": reverse("home"),
+            "history": reverse("analysis_history"),
+            "detail": reverse("analysis_detail", args=[DETAIL_SENTINEL]).replace(str(DETAIL_SENTINEL), "{pk}"),
+        }
+        # The server has to share this database, so a temporary user made here can log in there.
+        temporary = None
+        username, password = options["username"], options["password"]
+        if not username:
+            username, password = f"loadtest-{secrets.token_hex(4)}", secrets.token_urlsafe(16)
+            temporary = User.objects.create_user(username, password=password)
+
+        self.stderr.write(f"Generating {doc_size:,}-byte documents ({', '.join(formats)})...")
+        documents = build_documents(doc_size, formats)
+        self.stderr.write(f"{options['clients']} clients against {options['url']} for "
+                          f"{options['duration']:g}s as {username}...")
+        try:
+            results = run_load_test(
+                options["url"], paths, username, password, max(1, options["clients"]), options["duration"],
+                max(0, options["requests"]), mix, documents, options["timeout"], not options["insecure"],
+            )
+        except (LoadTestError, OSError) as exc:
+            raise CommandError(f"Load test failed: {exc}")
+        finally:
+            if temporary and not options["keep_data"]:
+                temporary.delete()
+
+        self.stdout.write(f"{'endpoint':<10}{'requests':>10}{'errors':>8}{'req/s':>9}"
+                          f"{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}  (ms)")
+        for name, stats in results["endpoints"].items():
+            self.stdout.write(
+                f"{name:<10}{stats['requests']:>10}{stats['errors']:>8}{stats['throughput']:>9.2f}"
+                + "".join(f"{stats[k] * 1000:>10.1f}" if stats[k] is not None else f"{'-':>10}"
+                          for k in ("mean", "p50", "p95", "p99", "max"))
+            )
+            if stats["error_kinds"]:
+                self.stdout.write("          errors: " + ", ".join(
+                    f"{kind} x{count}" for kind, count in sorted(stats["error_kinds"].items())))
+            if stats["server_timing_mean_ms"]:
+                self.stdout.write("          server: " + ", ".join(
+                    f"{stage} {ms:.1f}" for stage, ms in stats["server_timing_mean_ms"].items()))
+        self.stdout.write(f"{results['requests']} requests, {results['errors']} errors in {results['elapsed']:.1f}s: "
+                          f"{results['throughput']:.2f} req/s.")
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(results, indent=2) + "\n")
+            self.stderr.write(f"Wrote {options['output']}.")
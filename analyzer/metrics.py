@@ -0,0 +1,204 @@
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+# Seconds; analyzer stages span sub-millisecond regex passes to multi-second PDF parses.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (1e3, 1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6, 1e7)
+
+_lock = threading.Lock()
+_registry: list["_Metric"] = []
+# Stage timings of the request being served; set by ServerTimingMiddleware.
+_request_timings: ContextVar[list | None] = ContextVar("request_timings", default=None)
+
+
+def enabled() -> bool:
+    try:
+        return getattr(settings, "ANALYZER_METRICS", False)
+    except ImproperlyConfigured:
+        return False
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self.series: dict[tuple, object] = {}
+        _registry.append(self)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with _lock:
+            items = sorted(self.series.items())
+            lines.extend(self._render_series(labels, value) for labels, value in items)
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        if not enabled():
+            return
+        key = tuple(sorted(labels.items()))
+        with _lock:
+            self.series[key] = self.series.get(key, 0) + amount
+
+    def _render_series(self, labels, value) -> str:
+        return f"{self.name}{_format_labels(labels)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: tuple):
+        super().__init__(name, documentation)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        if not enabled():
+            return
+        key = tuple(sorted(labels.items()))
+        idx = bisect.bisect_left(self.buckets, value)
+        with _lock:
+            series = self.series.get(key)
+            if series is None:
+                # Per-bucket counts (last slot is +Inf), then sum and count.
+                series = self.series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][idx] += 1
+            series[1] += value
+            series[2] += 1
+
+    def _render_series(self, labels, series) -> str:
+        counts, total, count = series
+        lines, cumulative = [], 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            le = "+Inf" if bound == float("inf") else _format_value(bound)
+            lines.append(f"{self.name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+        lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+        lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines)
+
+
+STAGE_SECONDS = Histogram("cvchecker_stage_seconds", "Time spent per analysis stage.", LATENCY_BUCKETS)
+UPLOAD_BYTES = Histogram("cvchecker_upload_bytes", "Size of uploaded documents.", SIZE_BUCKETS)
+DOCUMENT_CHARS = Histogram("cvchecker_document_chars", "Characters of text per analysed document.", SIZE_BUCKETS)
+CACHE_REQUESTS = Counter("cvchecker_cache_requests_total", "Cache lookups by cache and result (hit/miss).")
+EXTRACTION_FAILURES = Counter("cvchecker_extraction_failures_total", "Documents that couldn't be extracted.")
+STORED_FILES = Counter("cvchecker_stored_files_total", "Uploads stored, by result (written/deduplicated).")
+
+
+def record_stage(name: str, seconds: float, **labels):
+    STAGE_SECONDS.observe(seconds, stage=name, **labels)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((name, seconds))
+
+
+class _Stage:
+    __slots__ = ("name", "labels", "started")
+
+    def __init__(self, name: str, labels: dict):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        record_stage(self.name, time.perf_counter() - self.started, **self.labels)
+
+
+class _NoStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+_NO_STAGE = _NoStage()
+
+
+def stage(name: str, **labels):
+    """``with stage("seniority"):`` times the block; a shared no-op when metrics are disabled."""
+    return _Stage(name, labels) if enabled() else _NO_STAGE
+
+
+def server_timing_header(timings: list[tuple[str, float]]) -> str:
+    # Repeated stages (CV and JD) are summed; durations are in milliseconds.
+    totals: dict[str, float] = {}
+    for name, seconds in timings:
+        totals[name] = totals.get(name, 0.0) + seconds
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in totals.items())
+
+
+def render() -> str:
+    return "\n".join(line for metric in _registry for line in metric.render()) + "\n"
+
+
+class ServerTimingMiddleware:
+    """Collects the stage timings of each request into a ``Server-Timing`` header."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not enabled():
+            return self.get_response(request)
+        token, started = _request_timings.set([]), time.perf_counter()
+        try:
+            response = self.get_response(request)
+            return self._add_header(response, started)
+        finally:
+            _request_timings.reset(token)
+
+    async def __acall__(self, request):
+        if not enabled():
+            return await self.get_response(request)
+        token, started = _request_timings.set([]), time.perf_counter()
+        try:
+            response = await self.get_response(request)
+            return self._add_header(response, started)
+        finally:
+            _request_timings.reset(token)
+
+    @staticmethod
+    def _add_header(response, started: float):
+        timings = _request_timings.get()
+        timings.append(("total", time.perf_counter() - started))
+        response["Server-Timing"] = server_timing_header(timings)
+        return response
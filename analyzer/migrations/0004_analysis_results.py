@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-18 05:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyzer', '0003_analysis_company_analysis_job_title'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysis',
+            name='results',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='analysis',
+            name='results_version',
+            field=models.CharField(blank=True, default='', max_length=32),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.5 on 2026-10-18 05:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_skills(apps, schema_editor):
+    Analysis = apps.get_model("analyzer", "Analysis")
+    DocumentSkill = apps.get_model("analyzer", "DocumentSkill")
+    native = schema_editor.connection.vendor == "postgresql"
+    for analysis in Analysis.objects.exclude(results=None).iterator(chunk_size=500):
+        analysis.cv_skills = sorted(analysis.results.get("cv_keywords_full") or [])
+        analysis.jd_skills = sorted(analysis.results.get("jd_keywords_full") or [])
+        analysis.save(update_fields=["cv_skills", "jd_skills"])
+        if native:
+            continue
+        DocumentSkill.objects.bulk_create(
+            [DocumentSkill(user_id=analysis.user_id, analysis_id=analysis.pk, kind="cv", skill=s[:100])
+             for s in set(analysis.cv_skills)]
+            + [DocumentSkill(user_id=analysis.user_id, analysis_id=analysis.pk, kind="jd", skill=s[:100])
+               for s in set(analysis.jd_skills)],
+            ignore_conflicts=True,
+        )
+
+
+def create_gin_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for column in ("cv_skills", "jd_skills"):
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS analyzer_analysis_{column}_gin ON analyzer_analysis USING gin ({column})"
+        )
+
+
+def drop_gin_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for column in ("cv_skills", "jd_skills"):
+        schema_editor.execute(f"DROP INDEX IF EXISTS analyzer_analysis_{column}_gin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyzer', '0005_analysis_jobs'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysis',
+            name='cv_skills',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='analysis',
+            name='jd_skills',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.CreateModel(
+            name='DocumentSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('cv', 'CV'), ('jd', 'Job description')], max_length=2)),
+                ('skill', models.CharField(max_length=100)),
+                ('analysis', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='skill_rows', to='analyzer.analysis')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'kind', 'skill'], name='analyzer_do_user_id_524669_idx')],
+                'constraints': [models.UniqueConstraint(fields=('analysis', 'kind', 'skill'), name='unique_document_skill')],
+            },
+        ),
+        migrations.RunPython(create_gin_indexes, drop_gin_indexes),
+        migrations.RunPython(backfill_skills, migrations.RunPython.noop),
+    ]
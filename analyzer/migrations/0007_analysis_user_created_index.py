@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-18 05:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyzer', '0006_skill_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='analysis',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='analyzer_an_user_id_99381c_idx'),
+        ),
+    ]
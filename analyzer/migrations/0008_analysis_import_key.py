@@ -0,0 +1,24 @@
+# Generated by Django 5.2.5 on 2026-10-18 06:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analyzer', '0007_analysis_user_created_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysis',
+            name='import_key',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='analysis',
+            constraint=models.UniqueConstraint(fields=('user', 'import_key'), name='unique_analysis_import_key'),
+        ),
+    ]
@@ -1,5 +1,17 @@
-from django.db import models
+from functools import partial
+
+from django.db import connections, models, transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.contrib.auth.models import User
+from . import nlp_utils
+
+
+class AnalysisStatus(models.TextChoices):
+    PENDING = "pending", "Pending"
+    RUNNING = "running", "Running"
+    DONE = "done", "Done"
+    FAILED = "failed", "Failed"
 
 
 class Analysis(models.Model):
@@ -11,16 +23,136 @@ class Analysis(models.Model):
 
     cv_file = models.FileField(upload_to="uploads/cv/", blank=True, null=True)
     jd_file = models.FileField(upload_to="uploads/jd/", blank=True, null=True)
+    # Stored files are named after their content; these keep the names they were uploaded under.
+    cv_filename = models.CharField(max_length=255, blank=True, default="")
+    jd_filename = models.CharField(max_length=255, blank=True, default="")
 
-    cv_text = models.TextField()
-    jd_text = models.TextField()
+    cv_text = models.TextField(blank=True, default="")
+    jd_text = models.TextField(blank=True, default="")
+
+    status = models.CharField(max_length=16, choices=AnalysisStatus.choices, default=AnalysisStatus.DONE)
+    error = models.TextField(blank=True, default="")
 
     match_percent = models.FloatField(null=True, blank=True)
     cv_keywords = models.JSONField(null=True, blank=True)
     jd_keywords = models.JSONField(null=True, blank=True)
+    results = models.JSONField(null=True, blank=True)
+    results_version = models.CharField(max_length=32, blank=True, default="")
+    # Canonical skill sets for search; GIN-indexed on PostgreSQL, mirrored into DocumentSkill elsewhere.
+    cv_skills = models.JSONField(default=list, blank=True)
+    jd_skills = models.JSONField(default=list, blank=True)
+
+    # Set by import_documents so an interrupted import can skip the pairs it already wrote.
+    import_key = models.CharField(max_length=64, blank=True, null=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        # Backs the history list: WHERE user = ? ORDER BY created_at DESC, id DESC.
+        indexes = [models.Index(fields=["user", "created_at", "id"])]
+        constraints = [
+            models.UniqueConstraint(fields=["user", "import_key"], name="unique_analysis_import_key"),
+        ]
+
+    def set_results(self, results: dict):
+        self.results = results
+        self.results_version = nlp_utils.RESULTS_VERSION
+        self.match_percent = results["match_percent"]
+        self.cv_keywords = results["cv_keywords"]
+        self.jd_keywords = results["jd_keywords"]
+        self.cv_skills = sorted(results["cv_keywords_full"])
+        self.jd_skills = sorted(results["jd_keywords_full"])
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        with transaction.atomic(using=kwargs.get("using") or self._state.db):
+            super().save(*args, **kwargs)
+            if update_fields is None or {"cv_skills", "jd_skills"} & set(update_fields):
+                DocumentSkill.sync(self)
+
+    def get_results(self) -> dict:
+        if self.results is None or self.results_version != nlp_utils.RESULTS_VERSION:
+            self.set_results(nlp_utils.analyze_texts(self.cv_text, self.jd_text))
+            self.save(update_fields=["results", "results_version", "match_percent", "cv_keywords",
+                                     "jd_keywords", "cv_skills", "jd_skills", "updated_at"])
+        return self.results
+
+    def __str__(self):
+        return f"Analysis by {self.user.username} on {self.created_at.strftime('%Y-%m-%d %H:%M')}"
+
+
+class AnalysisJob(models.Model):
+    analysis = models.OneToOneField(Analysis, on_delete=models.CASCADE, related_name="job")
+    status = models.CharField(max_length=16, choices=AnalysisStatus.choices, default=AnalysisStatus.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    worker = models.CharField(max_length=64, blank=True, default="")
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default="")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "created_at"])]
+
     def __str__(self):
-        return f"Analysis by {self.user.username} on {self.created_at.strftime('%Y-%m-%d %H:%M')}"
\ No newline at end of file
+        return f"Job for analysis {self.analysis_id} ({self.status})"
+
+
+@receiver(post_delete, sender=Analysis)
+def _release_files(sender, instance, using, **kwargs):
+    # Drops this analysis' references once the delete commits; shared blobs stay until their last one goes.
+    for field_file in (instance.cv_file, instance.jd_file):
+        if field_file:
+            transaction.on_commit(partial(field_file.storage.delete, field_file.name), using=using)
+
+
+class StoredBlob(models.Model):
+    """Reference count of a file kept by ContentAddressedStorage."""
+
+    name = models.CharField(max_length=100, primary_key=True)
+    size = models.PositiveBigIntegerField(default=0)
+    refs = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.refs} references)"
+
+
+class DocumentSkill(models.Model):
+    """One row per (analysis, document, skill): the skill index for databases without GIN/JSONB."""
+
+    KIND_CV = "cv"
+    KIND_JD = "jd"
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    analysis = models.ForeignKey(Analysis, on_delete=models.CASCADE, related_name="skill_rows")
+    kind = models.CharField(max_length=2, choices=[(KIND_CV, "CV"), (KIND_JD, "Job description")])
+    skill = models.CharField(max_length=100)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["analysis", "kind", "skill"], name="unique_document_skill"),
+        ]
+        indexes = [models.Index(fields=["user", "kind", "skill"])]
+
+    @staticmethod
+    def uses_native_index(using: str = "default") -> bool:
+        return connections[using].vendor == "postgresql"
+
+    @classmethod
+    def sync(cls, analysis: Analysis):
+        using = analysis._state.db or "default"
+        if cls.uses_native_index(using):
+            return
+        cls.objects.using(using).filter(analysis=analysis).delete()
+        cls.objects.using(using).bulk_create(cls.rows_for(analysis))
+
+    @classmethod
+    def rows_for(cls, analysis: Analysis) -> list["DocumentSkill"]:
+        return [
+            cls(user_id=analysis.user_id, analysis=analysis, kind=kind, skill=skill[:100])
+            for kind, skills in ((cls.KIND_CV, analysis.cv_skills), (cls.KIND_JD, analysis.jd_skills))
+            for skill in {s[:100] for s in skills or []}
+        ]
@@ -1,14 +1,33 @@
 import re
+import os
+import sys
 import json
+import mmap
+import time
+import pickle
+import hashlib
+import logging
+import threading
 import unicodedata
-from collections import Counter, defaultdict
+from collections import Counter, OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from functools import cached_property, lru_cache
 from pathlib import Path
-from langdetect import detect
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from langdetect import DetectorFactory, detect
 from langdetect.lang_detect_exception import LangDetectException
+from .metrics import CACHE_REQUESTS, DOCUMENT_CHARS, stage
+
+DetectorFactory.seed = 0
+
+logger = logging.getLogger(__name__)
 
 BASE_DIR = Path(__file__).resolve().parent.parent / "config"
 TAXONOMY_PATH = BASE_DIR / "skills_taxonomy.json"
 LEVEL_SIGNALS_PATH = BASE_DIR / "level_signals.json"
+FUZZY_STOPLIST_PATH = BASE_DIR / "fuzzy_stoplist.txt"
 
 def normalize_word(text: str) -> str:
     return unicodedata.normalize("NFKC", (text or "").strip().lower())
@@ -22,33 +41,27 @@ def _load_json(path: Path, default):
     except (OSError, json.JSONDecodeError):
         return default
 
-_raw_taxonomy = _load_json(TAXONOMY_PATH, {})
-_level_signals = _load_json(LEVEL_SIGNALS_PATH, {})
-
-CATEGORY_SKILLS: dict[str, set[str]] = {}
-ALIAS_LOOKUP: dict[str, str] = {}
-SKILL_TO_CATEGORY: dict[str, str] = {}
-
-for cat_name, entry_map in (_raw_taxonomy or {}).items():
-    cat_norm = normalize_word(cat_name)
-    CATEGORY_SKILLS[cat_norm] = set()
-
-    skills_list = (entry_map or {}).get("skills", []) or []
-    aliases_map = (entry_map or {}).get("aliases", {}) or {}
+def _load_word_list(path: Path) -> list[str]:
+    # One word per line; blank lines and "#" comments are skipped.
+    try:
+        with open(path, encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+    except OSError:
+        return []
 
-    for canon_name in skills_list:
-        canon_norm = normalize_word(canon_name)
-        if not canon_norm:
-            continue
-        CATEGORY_SKILLS[cat_norm].add(canon_norm)
-        SKILL_TO_CATEGORY[canon_norm] = cat_norm
-        ALIAS_LOOKUP[canon_norm] = canon_norm
+def _files_digest(*paths: Path) -> str:
+    h = hashlib.blake2b(digest_size=6)
+    for path in paths:
+        try:
+            h.update(path.read_bytes())
+        except OSError:
+            h.update(b"-")
+    return h.hexdigest()
 
-    for alias_name, target in aliases_map.items():
-        alias_norm = normalize_word(alias_name)
-        target_norm = normalize_word(target)
-        if alias_norm and target_norm and target_norm in SKILL_TO_CATEGORY:
-            ALIAS_LOOKUP[alias_norm] = target_norm
+# Bump ANALYZER_VERSION whenever analyze_texts output changes; stored results are recomputed on mismatch.
+ANALYZER_VERSION = "4"
+# Bump when the pickled layout of a compiled taxonomy changes; older artifacts are then ignored.
+TAXONOMY_ARTIFACT_FORMAT = 2
 
 NOISE_TERMS = {
     "experience","years","year","education","degree","bachelor","master","phd",
@@ -62,88 +75,231 @@ NOISE_TERMS = {
 def _split_connectors(s: str) -> list[str]:
     return re.split(r"[ \t_/-]+", s)
 
-def _build_phrase_patterns(alias_lookup: dict[str, str]):
-    items: list[tuple[re.Pattern[str], str]] = []
-    pairs = sorted(alias_lookup.items(), key=lambda kv: len(kv[0]), reverse=True)
-    for alias_val, canon_val in pairs:
-        if any(ch in alias_val for ch in (" ", "-", "_", "/", ".")):
-            parts = [re.escape(p) for p in _split_connectors(alias_val) if p]
+_CONNECTOR_CHARS = frozenset(" \t_/.-")
+_CONNECTOR_EDGE = " "
+_TERMINAL = None
+_WORD_RUN_RE = re.compile(r"\b[^\W_]+")
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+def _at_word_boundary(text: str, pos: int) -> bool:
+    before = pos > 0 and _is_word_char(text[pos - 1])
+    after = pos < len(text) and _is_word_char(text[pos])
+    return before != after
+
+class PhraseMatcher:
+    """Trie over multi-word aliases; one scan per document, connector runs are single edges.
+
+    Overlaps resolve like the old per-alias ``re.sub`` cascade: longest alias first, then leftmost.
+    """
+
+    def __init__(self, alias_lookup: dict[str, str]):
+        self.trie: dict = {}
+        pairs = sorted(alias_lookup.items(), key=lambda kv: len(kv[0]), reverse=True)
+        for priority, (alias_val, canon_val) in enumerate(pairs):
+            if not any(ch in alias_val for ch in (" ", "-", "_", "/", ".")):
+                continue
+            parts = [p for p in _split_connectors(alias_val) if p]
             if not parts:
                 continue
-            connector = r"[ \t_/.\-]+"
-            pat = re.compile(r"\b" + connector.join(parts) + r"\b", flags=re.IGNORECASE)
-            placeholder = "__" + canon_val.replace(" ", "_") + "__"
-            items.append((pat, placeholder))
-    return items
+            node = self.trie
+            for i, part in enumerate(parts):
+                if i:
+                    node = node.setdefault(_CONNECTOR_EDGE, {})
+                for ch in part:
+                    node = node.setdefault(ch, {})
+            if _TERMINAL not in node:
+                node[_TERMINAL] = (priority, canon_val)
+        self._lead_words = set()
+        odd_starts = set()
+        for ch, child in self.trie.items():
+            if ch is _TERMINAL:
+                continue
+            if ch.isalnum():
+                self._collect_lead_words(ch, child)
+            else:
+                odd_starts.add(re.escape(ch))
+        # Aliases that begin with punctuation (".net") can't be found by word lookup.
+        self._odd_start_re = re.compile(r"\b(?=[" + "".join(sorted(odd_starts)) + "])") if odd_starts else None
 
-_PHRASE_PATTERNS = _build_phrase_patterns(ALIAS_LOOKUP)
+    def _collect_lead_words(self, prefix: str, node: dict):
+        for ch, child in node.items():
+            if ch is not _TERMINAL and ch.isalnum():
+                self._collect_lead_words(prefix + ch, child)
+            else:
+                self._lead_words.add(prefix)
+
+    def _collect_candidates(self, text: str, start: int, out: list):
+        n = len(text)
+        stack = [(self.trie, start)]
+        while stack:
+            node, pos = stack.pop()
+            term = node.get(_TERMINAL)
+            if term and _at_word_boundary(text, pos):
+                out.append((term[0], start, pos, term[1]))
+            if pos >= n:
+                continue
+            ch = text[pos]
+            if ch in _CONNECTOR_CHARS:
+                conn = node.get(_CONNECTOR_EDGE)
+                if conn:
+                    end = pos + 1
+                    while end < n and text[end] in _CONNECTOR_CHARS:
+                        end += 1
+                    stack.append((conn, end))
+                    # Shorter runs only matter if a literal "." follows.
+                    stack.extend((conn, k) for k in range(pos + 1, end) if text[k] == ".")
+                if ch != ".":
+                    continue
+            nxt = node.get(ch) or node.get(ch.lower())
+            if nxt:
+                stack.append((nxt, pos + 1))
+
+    def find_spans(self, text: str) -> list[tuple[int, int, str]]:
+        if not text or not self.trie:
+            return []
+        candidates: list[tuple[int, int, int, str]] = []
+        lead_words = self._lead_words
+        for m in _WORD_RUN_RE.finditer(text):
+            if m.group().lower() in lead_words:
+                self._collect_candidates(text, m.start(), candidates)
+        if self._odd_start_re is not None:
+            for m in self._odd_start_re.finditer(text):
+                self._collect_candidates(text, m.start(), candidates)
+        candidates.sort()
+        taken = bytearray(len(text))
+        spans: list[tuple[int, int, str]] = []
+        for _, start, end, canon in candidates:
+            if taken.find(1, start, end) != -1:
+                continue
+            taken[start:end] = b"\x01" * (end - start)
+            spans.append((start, end, canon))
+        spans.sort()
+        return spans
+
+def _placeholder_for(canon: str) -> str:
+    return "__" + canon.replace(" ", "_") + "__"
 
 def _apply_phrase_placeholders(text: str) -> str:
-    new_text = text
-    for pattern, placeholder in _PHRASE_PATTERNS:
-        new_text = pattern.sub(placeholder, new_text)
-    return new_text
+    pieces: list[str] = []
+    pos = 0
+    for start, end, canon in get_taxonomy().phrase_matcher.find_spans(text):
+        pieces.append(text[pos:start])
+        pieces.append(_placeholder_for(canon))
+        pos = end
+    pieces.append(text[pos:])
+    return "".join(pieces)
 
-def _extract_placeholders(text: str) -> list[str]:
-    return re.findall(r"__([a-z0-9_]+)__", text)
+_PLACEHOLDER_RE = re.compile(r"__([a-z0-9_]+)__")
 
-def _canonicalize_token(token: str) -> str | None:
-    token = re.sub(r'[.,;:!?)\]"\'”’}>]+$', '', token or "")
-    t = normalize_word(token)
-    if not t or t in NOISE_TERMS:
-        return None
-    mapped = ALIAS_LOOKUP.get(t)
-    if mapped:
-        return mapped
-    short_whitelist = {"go","r","c","c#","c++"}
-    if (len(t) < 3 and t not in short_whitelist) or t.isdigit():
-        return None
-    if t in SKILL_TO_CATEGORY:
-        return t
-    return None
+def _extract_placeholders(text: str) -> list[str]:
+    return _PLACEHOLDER_RE.findall(text)
 
 _TOKEN_RE = re.compile(r"[a-z0-9#+.]+", flags=re.IGNORECASE)
+_TRAILING_PUNCT_RE = re.compile(r'[.,;:!?)\]"\'”’}>]+$')
+
+def _normalize_token(token: str) -> str:
+    return normalize_word(_TRAILING_PUNCT_RE.sub("", token or ""))
+
+LANG_SAMPLE_CHARS = 2000
+_LANG_CACHE_SIZE = 1024
+_LANG_CACHE: OrderedDict[str, str] = OrderedDict()
+_LANG_CACHE_LOCK = threading.Lock()
 
-def tokenize_and_normalize(text: str, lang: str | None = None) -> tuple[list[str], str]:
+def _language_detection_enabled() -> bool:
+    try:
+        return getattr(settings, "ANALYZER_DETECT_LANGUAGE", True)
+    except ImproperlyConfigured:
+        return True
+
+def detect_language(text: str, default: str = "en") -> str:
+    if not text or not _language_detection_enabled():
+        return default
+    sample = text[:LANG_SAMPLE_CHARS]
+    if sample.isascii():
+        return default
+    key = hashlib.blake2b(sample.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+    with _LANG_CACHE_LOCK:
+        if key in _LANG_CACHE:
+            _LANG_CACHE.move_to_end(key)
+            CACHE_REQUESTS.inc(cache="language", result="hit")
+            return _LANG_CACHE[key]
+    CACHE_REQUESTS.inc(cache="language", result="miss")
+    try:
+        with stage("langdetect"):
+            lang = detect(sample) or default
+    except LangDetectException:
+        lang = default
+    with _LANG_CACHE_LOCK:
+        _LANG_CACHE[key] = lang
+        if len(_LANG_CACHE) > _LANG_CACHE_SIZE:
+            _LANG_CACHE.popitem(last=False)
+    return lang
+
+def tokenize_and_normalize(text: str, lang: str | None = None, taxonomy: "Taxonomy | None" = None,
+                           fuzzy: list | None = None) -> tuple[list[str], str]:
+    """Canonical skill tokens of ``text``. Words that only match a skill fuzzily are included too, and
+    each such hit is appended to ``fuzzy`` as ``(word, skill, confidence)`` when a list is passed."""
     if not text:
         return [], (lang or "en")
     if not lang:
-        try:
-            lang = detect(text) or "en"
-        except LangDetectException:
-            lang = "en"
-    replaced = _apply_phrase_placeholders(text)
-    tokens_list: list[str] = []
-    for ph in _extract_placeholders(replaced):
-        ph_norm = ph.replace("_", " ")
-        canonical = ALIAS_LOOKUP.get(ph_norm, ph_norm)
-        if canonical in SKILL_TO_CATEGORY:
-            tokens_list.append(canonical)
-    for raw_tok in _TOKEN_RE.findall(replaced):
-        if raw_tok.startswith("__") and raw_tok.endswith("__"):
-            continue
-        canonical = _canonicalize_token(raw_tok)
-        if canonical:
-            tokens_list.append(canonical)
-    return tokens_list, lang
+        lang = detect_language(text)
+    tax = taxonomy or get_taxonomy()
+    canonicalize_token = tax.canonicalize_token
+    fuzzy_token = tax.fuzzy_token
+    phrase_tokens: list[str] = []
+    word_tokens: list[str] = []
+
+    def scan_gap(start: int, end: int):
+        for m in _PLACEHOLDER_RE.finditer(text, start, end):
+            canonical = tax.placeholder_canonical(m.group(1))
+            if canonical:
+                phrase_tokens.append(canonical)
+        for m in _TOKEN_RE.finditer(text, start, end):
+            word = m.group()
+            canonical = canonicalize_token(word)
+            if canonical:
+                word_tokens.append(canonical)
+            elif len(word) >= FUZZY_MIN_LENGTH:
+                hit = fuzzy_token(word)
+                if hit:
+                    word_tokens.append(hit[1])
+                    if fuzzy is not None:
+                        fuzzy.append(hit)
+
+    with stage("phrases"):
+        spans = tax.phrase_matcher.find_spans(text)
+    pos = 0
+    for start, end, canon in spans:
+        scan_gap(pos, start)
+        phrase, inner = tax.span_tokens(canon)
+        phrase_tokens.extend(phrase)
+        word_tokens.extend(inner)
+        pos = end
+    scan_gap(pos, len(text))
+    return phrase_tokens + word_tokens, lang
 
 def extract_keywords(text: str, top_n: int = 20, lang: str | None = None) -> list[str]:
-    tokens_list, _ = tokenize_and_normalize(text, lang)
-    tokens_list = [t for t in tokens_list if t in SKILL_TO_CATEGORY]
+    tax = get_taxonomy()
+    tokens_list, _ = tokenize_and_normalize(text, lang, tax)
+    tokens_list = [t for t in tokens_list if t in tax.skill_to_category]
     return [kw for kw, _ in Counter(tokens_list).most_common(top_n)]
 
 def extract_all_keywords(text: str, lang: str | None = None) -> tuple[list[str], list[tuple[str, int]]]:
-    tokens_list, _ = tokenize_and_normalize(text or "", lang)
-    tokens_list = [t for t in tokens_list if t in SKILL_TO_CATEGORY]
+    tax = get_taxonomy()
+    tokens_list, _ = tokenize_and_normalize(text or "", lang, tax)
+    tokens_list = [t for t in tokens_list if t in tax.skill_to_category]
     counts = Counter(tokens_list)
     ordered = counts.most_common()
     full_list = [k for k, _ in ordered]
     return full_list, ordered
 
-def map_tokens_to_categories(tokens: list[str]) -> dict[str, set[str]]:
+def map_tokens_to_categories(tokens: list[str], taxonomy: "Taxonomy | None" = None) -> dict[str, set[str]]:
+    skill_to_category = (taxonomy or get_taxonomy()).skill_to_category
     categorized: dict[str, set[str]] = defaultdict(set)
     for tok in tokens:
-        cat = SKILL_TO_CATEGORY.get(tok)
+        cat = skill_to_category.get(tok)
         if cat:
             categorized[cat].add(tok)
     return categorized
@@ -159,38 +315,611 @@ def _norm_level_key(k: str) -> str:
         return k_norm
     return _LEVEL_KEY_MAP.get(k_norm, k_norm)
 
-def detect_seniority(text: str) -> dict:
-    doc = normalize_word(text or "")
-    scores = {"entry": 0, "mid": 0, "senior": 0, "expert": 0}
-    for level_key, payload in (_level_signals or {}).items():
-        level_norm = _norm_level_key(level_key)
-        if level_norm not in scores: continue
-        for phrase in (payload or {}).get("phrases", []):
-            if normalize_word(phrase) and re.search(r"\b"+re.escape(phrase)+r"\b", doc):
-                scores[level_norm] += 1
-        for rx in (payload or {}).get("regex", []):
-            try:
-                scores[level_norm] += len(re.compile(rx, re.I).findall(doc))
-            except re.error: continue
+_LEVELS = ("entry", "mid", "senior", "expert")
+# Modifier sections carry no level of their own; unless the config says otherwise they nudge these levels.
+_DEFAULT_ADJUST = {
+    "boosters": {"senior": 0.5, "expert": 0.5},
+    "demoters": {"entry": 0.5, "senior": -0.5, "expert": -0.5},
+}
+
+def _trie_regex(words: list[str]) -> str:
+    # Prefix-shared alternation; optional tails are greedy so the longest word wins.
+    trie: dict = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        alts = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = "(?:" + "|".join(alts) + ")" if len(alts) > 1 else alts[0]
+        if "" in node:
+            return "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+class SeniorityDetector:
+    """Level signals compiled once: every phrase in one trie regex, and each regex on its own.
+
+    Counting matches what detect_seniority used to do: a phrase scores once per document wherever it
+    occurs, including inside a longer phrase ("lead" in "tech lead", "mid" in "mid-level"), and each
+    regex scores once per non-overlapping match, even where another signal matched the same text
+    ("5+ years" counts for both senior regexes). Boosters/demoters add their ``adjust`` weights.
+    Evidence spans are offsets into the NFKC-lowercased text.
+    """
+
+    def __init__(self, level_signals: dict):
+        self.signals: list[tuple[str, str, bool, dict[str, float]]] = []
+        self.phrase_signals: dict[str, list[int]] = defaultdict(list)
+        self.regexes: list[tuple[int, re.Pattern]] = []
+        for section_key, payload in (level_signals or {}).items():
+            payload = payload or {}
+            section = normalize_word(section_key)
+            level = _norm_level_key(section_key)
+            if level in _LEVELS:
+                adjust = {level: payload.get("weight", 1)}
+            elif "adjust" in payload or section in _DEFAULT_ADJUST:
+                adjust = {_norm_level_key(k): v for k, v in payload.get("adjust", _DEFAULT_ADJUST.get(section, {})).items()}
+                adjust = {k: v for k, v in adjust.items() if k in _LEVELS}
+            else:
+                continue
+            for phrase in payload.get("phrases", []):
+                phrase_norm = normalize_word(phrase)
+                if phrase_norm:
+                    self.phrase_signals[phrase_norm].append(self._add(section, phrase_norm, True, adjust))
+            for rx in payload.get("regex", []):
+                try:
+                    compiled = re.compile(rx, re.I)
+                except re.error:
+                    continue
+                self.regexes.append((self._add(section, rx, False, adjust), compiled))
+
+        phrases = list(self.phrase_signals)
+        # The trie reports the longest phrase at each word start; the shorter phrases it begins with
+        # ("mid" for "mid-level") are looked up here instead of scanning again.
+        self.phrase_prefixes = {
+            p: [q for q in phrases if q != p and p.startswith(q) and re.match(re.escape(q) + r"\b", p)]
+            for p in phrases
+        }
+        # Zero-width, so a match doesn't consume the text: phrases that overlap ("tech lead" and
+        # "lead engineer") are all found.
+        self.pattern = re.compile(r"\b(?=(" + _trie_regex(phrases) + r")\b)") if phrases else None
+
+    def _add(self, section: str, signal: str, is_phrase: bool, adjust: dict[str, float]) -> int:
+        self.signals.append((section, signal, is_phrase, adjust))
+        return len(self.signals) - 1
+
+    def scan(self, text: str) -> tuple[dict, list[dict]]:
+        doc = normalize_word(text or "")
+        scores: dict[str, float] = {level: 0 for level in _LEVELS}
+        evidence: list[dict] = []
+        if not doc:
+            return scores, evidence
+        matches: list[tuple[int, int, list[int]]] = []
+        if self.pattern is not None:
+            for m in self.pattern.finditer(doc):
+                start, phrase = m.start(), m.group(1)
+                for found in (phrase, *self.phrase_prefixes.get(phrase, ())):
+                    matches.append((start, start + len(found), self.phrase_signals.get(found, [])))
+        for idx, rx in self.regexes:
+            matches.extend((m.start(), m.end(), [idx]) for m in rx.finditer(doc))
+        matches.sort(key=lambda match: match[0])
+        seen_phrases: set[int] = set()
+        for start, end, hits in matches:
+            for idx in hits:
+                section, signal, is_phrase, adjust = self.signals[idx]
+                evidence.append({"section": section, "signal": signal, "text": doc[start:end], "span": [start, end]})
+                if is_phrase:
+                    if idx in seen_phrases:
+                        continue
+                    seen_phrases.add(idx)
+                for level, weight in adjust.items():
+                    scores[level] += weight
+        return {k: round(v, 2) for k, v in scores.items()}, evidence
+
+# Fuzzy matching of unknown words to single-word aliases: words of seven letters or more, one typo (insert,
+# delete, substitute or swap two neighbours), same first letter, one unambiguous skill, and confidence
+# 1 - 1/len at or above the threshold. Real words are excluded: inflections of an alias ("composer",
+# "expresses") and the words in config/fuzzy_stoplist.txt ("gating", "cython").
+FUZZY_MIN_LENGTH = 7
+FUZZY_MIN_CONFIDENCE = 0.85
+# Shorter substitutions mostly turn one real word into another ("leaving" / "leading").
+FUZZY_MIN_SUBSTITUTION_LENGTH = 8
+# Endings that turn an alias into another real word. "e" endings are also tried on the alias minus its "e".
+_INFLECTIONS = ("s", "es", "d", "ed", "r", "er", "rs", "ers", "y", "ly", "ing")
+
+def _deletes(word: str) -> list[str]:
+    return [word[:i] + word[i + 1:] for i in range(len(word))]
+
+def _single_edit(a: str, b: str) -> tuple[str, int] | None:
+    """The one edit that turns ``a`` into ``b`` as (kind, position), or None."""
+    la, lb = len(a), len(b)
+    if a == b or abs(la - lb) > 1:
+        return None
+    i = 0
+    while i < min(la, lb) and a[i] == b[i]:
+        i += 1
+    if la == lb:
+        if a[i + 1:] == b[i + 1:]:
+            return "substitute", i
+        if a[i + 2:] == b[i + 2:] and a[i] == b[i + 1] and a[i + 1] == b[i]:
+            return "transpose", i
+        return None
+    if la < lb:
+        return ("insert", i) if a[i:] == b[i + 1:] else None
+    return ("delete", i) if a[i + 1:] == b[i:] else None
+
+def _is_typo(word: str, alias: str) -> bool:
+    # Inflections aren't typos: "system"/"systemd", "action"/"actions", "testing"/"testng" are different words.
+    edit = _single_edit(word, alias)
+    if edit is None:
+        return False
+    kind, i = edit
+    if kind == "substitute" and len(word) < FUZZY_MIN_SUBSTITUTION_LENGTH:
+        return False
+    if word.endswith("ing") != alias.endswith("ing"):
+        return False
+    if kind in ("insert", "delete") and i == min(len(word), len(alias)):
+        longer = alias if kind == "insert" else word
+        # A doubled last letter ("postgress") is a typo; a bare s/d/e suffix is grammar.
+        if longer[-1] in "sde" and longer[-2] != longer[-1]:
+            return False
+    return True
+
+class FuzzyIndex:
+    """SymSpell-style index: each single-word alias is stored under itself and its one-character
+    deletes, so a lookup only has to check the handful of aliases that share a delete with the word."""
+
+    def __init__(self, alias_lookup: dict[str, str], stoplist=frozenset()):
+        self.alias_lookup = alias_lookup
+        self.stoplist = stoplist
+        self.deletes: dict[str, tuple[str, ...]] = {}
+        grouped: dict[str, list[str]] = defaultdict(list)
+        for alias in alias_lookup:
+            if len(alias) >= FUZZY_MIN_LENGTH - 1 and alias.isalpha():
+                for key in {alias, *_deletes(alias)}:
+                    grouped[key].append(alias)
+        self.deletes = {key: tuple(aliases) for key, aliases in grouped.items()}
+
+    def lookup(self, word: str) -> tuple[str, float] | None:
+        """(skill, confidence) for a word one typo away from exactly one skill, else None."""
+        if word in self.stoplist or self._inflects_alias(word):
+            return None
+        deletes = self.deletes
+        candidates = set(deletes.get(word, ()))
+        for key in _deletes(word):
+            candidates.update(deletes.get(key, ()))
+        best, best_confidence = None, 0.0
+        for alias in candidates:
+            if alias[0] != word[0] or not _is_typo(word, alias):
+                continue
+            canonical = self.alias_lookup[alias]
+            confidence = 1.0 - 1.0 / max(len(word), len(alias))
+            if best is not None and canonical != best:
+                return None
+            best, best_confidence = canonical, max(best_confidence, confidence)
+        if best is None or best_confidence < FUZZY_MIN_CONFIDENCE:
+            return None
+        return best, round(best_confidence, 3)
+
+    def _inflects_alias(self, word: str) -> bool:
+        for suffix in _INFLECTIONS:
+            stem = word[:-len(suffix)]
+            # A doubled last letter ("postgress") is a typo, as in _is_typo.
+            if not word.endswith(suffix) or not stem or stem[-1] == suffix[0]:
+                continue
+            if stem in self.alias_lookup or (suffix[0] in "ei" and stem + "e" in self.alias_lookup):
+                return True
+        return False
+
+class Taxonomy:
+    """Skill tables, phrase matcher and seniority detector for one version of the config files.
+
+    Never mutated once built: a reload creates a new instance and swaps the module reference, so a
+    caller holding one sees a consistent view. ``skills`` fixes each skill's index (``skill_ids``);
+    compiled artifacts keep it append-only, but other builds may order it differently (``skills_digest``).
+    """
+
+    def __init__(self, version: str, skills, category_skills: dict[str, set[str]], alias_lookup: dict[str, str],
+                 skill_to_category: dict[str, str], phrase_matcher: PhraseMatcher, seniority: SeniorityDetector,
+                 fuzzy_stoplist=frozenset()):
+        self.version = version
+        self.results_version = f"{ANALYZER_VERSION}-{version}"
+        self.skills = tuple(skills)
+        self.skill_ids = {skill: i for i, skill in enumerate(self.skills)}
+        # The bit layout of skill masks. Two builds of one config share a results_version but can order
+        # skills differently (the JSON fallback has no previous_skills), so anything caching masks across
+        # processes must key on this too.
+        self.skills_digest = hashlib.blake2b("\n".join(self.skills).encode(), digest_size=8).hexdigest()
+        self.category_skills = category_skills
+        self.alias_lookup = alias_lookup
+        self.skill_to_category = skill_to_category
+        self.phrase_matcher = phrase_matcher
+        self.seniority = seniority
+        self.fuzzy_stoplist = frozenset(fuzzy_stoplist)
+        # Bit i of a skill mask stands for skills[i]. A skill counts towards the one category
+        # skill_to_category gives it, as in map_tokens_to_categories.
+        self.category_masks = dict.fromkeys(category_skills, 0)
+        for skill, cat in skill_to_category.items():
+            self.category_masks[cat] |= 1 << self.skill_ids[skill]
+        self.canonicalize_token = lru_cache(maxsize=65536)(self._canonicalize_token)
+        self.fuzzy_token = lru_cache(maxsize=65536)(self._fuzzy_token)
+        self.span_tokens = lru_cache(maxsize=None)(self._span_tokens)
+
+    @classmethod
+    def from_config(cls, raw_taxonomy: dict, level_signals: dict, version: str, previous_skills=(),
+                    fuzzy_stoplist=()) -> "Taxonomy":
+        category_skills: dict[str, set[str]] = {}
+        alias_lookup: dict[str, str] = {}
+        skill_to_category: dict[str, str] = {}
+
+        for cat_name, entry_map in (raw_taxonomy or {}).items():
+            cat_norm = sys.intern(normalize_word(cat_name))
+            category_skills[cat_norm] = set()
+
+            skills_list = (entry_map or {}).get("skills", []) or []
+            aliases_map = (entry_map or {}).get("aliases", {}) or {}
+
+            for canon_name in skills_list:
+                canon_norm = sys.intern(normalize_word(canon_name))
+                if not canon_norm:
+                    continue
+                category_skills[cat_norm].add(canon_norm)
+                skill_to_category[canon_norm] = cat_norm
+                alias_lookup[canon_norm] = canon_norm
+
+            for alias_name, target in aliases_map.items():
+                alias_norm = normalize_word(alias_name)
+                target_norm = sys.intern(normalize_word(target))
+                if alias_norm and target_norm and target_norm in skill_to_category:
+                    alias_lookup[alias_norm] = target_norm
+
+        known = set(previous_skills)
+        skills = list(previous_skills) + sorted(s for s in skill_to_category if s not in known)
+        return cls(version, skills, category_skills, alias_lookup, skill_to_category,
+                   PhraseMatcher(alias_lookup), SeniorityDetector(level_signals),
+                   {normalize_word(w) for w in fuzzy_stoplist} - set(alias_lookup))
+
+    @classmethod
+    def from_files(cls, taxonomy_path: Path = TAXONOMY_PATH, level_signals_path: Path = LEVEL_SIGNALS_PATH,
+                   previous_skills=(), fuzzy_stoplist_path: Path = FUZZY_STOPLIST_PATH) -> "Taxonomy":
+        return cls.from_config(_load_json(taxonomy_path, {}), _load_json(level_signals_path, {}),
+                               _files_digest(taxonomy_path, level_signals_path, fuzzy_stoplist_path), previous_skills,
+                               _load_word_list(fuzzy_stoplist_path))
+
+    def skills_mask(self, skills) -> int:
+        skill_ids = self.skill_ids
+        mask = 0
+        for skill in skills:
+            idx = skill_ids.get(skill)
+            if idx is not None:
+                mask |= 1 << idx
+        return mask
+
+    def mask_skills(self, mask: int) -> list[str]:
+        names = []
+        while mask:
+            low = mask & -mask
+            names.append(self.skills[low.bit_length() - 1])
+            mask ^= low
+        names.sort()
+        return names
+
+    @cached_property
+    def fuzzy_index(self) -> FuzzyIndex:
+        # Built on first use in each process; it's derived data and isn't part of the compiled artifact.
+        return FuzzyIndex(self.alias_lookup, self.fuzzy_stoplist)
+
+    def _canonicalize_token(self, token: str) -> str | None:
+        t = _normalize_token(token)
+        if not t or t in NOISE_TERMS:
+            return None
+        mapped = self.alias_lookup.get(t)
+        if mapped:
+            return mapped
+        short_whitelist = {"go","r","c","c#","c++"}
+        if (len(t) < 3 and t not in short_whitelist) or t.isdigit():
+            return None
+        if t in self.skill_to_category:
+            return t
+        return None
+
+    def _fuzzy_token(self, token: str) -> tuple[str, str, float] | None:
+        """(word, skill, confidence) for a token canonicalize_token rejects but that is one typo away from
+        a skill, e.g. "kubernets"."""
+        t = _normalize_token(token)
+        if len(t) < FUZZY_MIN_LENGTH or not t.isalpha() or t in NOISE_TERMS:
+            return None
+        hit = self.fuzzy_index.lookup(t)
+        return (t, *hit) if hit else None
+
+    def placeholder_canonical(self, ph: str) -> str | None:
+        ph_norm = ph.replace("_", " ")
+        canonical = self.alias_lookup.get(ph_norm, ph_norm)
+        return canonical if canonical in self.skill_to_category else None
+
+    def _span_tokens(self, canon: str) -> tuple[tuple[str, ...], tuple[str, ...]]:
+        # A matched phrase yields the same tokens its placeholder would.
+        placeholder = _placeholder_for(canon)
+        phrase = tuple(c for c in map(self.placeholder_canonical, _extract_placeholders(placeholder)) if c)
+        inner = tuple(c for c in map(self.canonicalize_token, _TOKEN_RE.findall(placeholder)) if c)
+        return phrase, inner
+
+    def dump(self, path: Path):
+        # Written next to the target and renamed over it, so readers never see a partial file.
+        payload = {
+            "format": TAXONOMY_ARTIFACT_FORMAT,
+            "version": self.version,
+            "skills": self.skills,
+            "category_skills": self.category_skills,
+            "alias_lookup": self.alias_lookup,
+            "skill_to_category": self.skill_to_category,
+            "phrase_matcher": self.phrase_matcher,
+            "seniority": self.seniority,
+            "fuzzy_stoplist": self.fuzzy_stoplist,
+        }
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp, "wb") as f:
+                pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    @classmethod
+    def load(cls, path: Path) -> "Taxonomy | None":
+        # The artifact is produced by `manage.py compile_taxonomy` and is trusted like the code itself.
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            payload = pickle.loads(mm)
+        if not isinstance(payload, dict) or payload.get("format") != TAXONOMY_ARTIFACT_FORMAT:
+            return None
+        return cls(payload["version"], payload["skills"], payload["category_skills"], payload["alias_lookup"],
+                   payload["skill_to_category"], payload["phrase_matcher"], payload["seniority"],
+                   payload.get("fuzzy_stoplist", ()))
+
+_taxonomy: Taxonomy | None = None
+_taxonomy_stamp: tuple | None = None
+_taxonomy_next_check = 0.0
+_TAXONOMY_LOCK = threading.Lock()
+
+def _taxonomy_settings() -> tuple[Path | None, float]:
+    try:
+        path = getattr(settings, "TAXONOMY_ARTIFACT", "")
+        interval = getattr(settings, "TAXONOMY_RELOAD_INTERVAL", 5.0)
+    except ImproperlyConfigured:
+        return None, 5.0
+    return (Path(path) if path else None), interval
+
+def _file_stamp(path: Path | None) -> tuple | None:
+    if path is None:
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+def get_taxonomy() -> Taxonomy:
+    """The current taxonomy. The compiled artifact is re-checked at most every
+    TAXONOMY_RELOAD_INTERVAL seconds and swapped in when it changes."""
+    current = _taxonomy
+    if current is not None and time.monotonic() < _taxonomy_next_check:
+        return current
+    return _refresh_taxonomy()
+
+def _refresh_taxonomy() -> Taxonomy:
+    global _taxonomy, _taxonomy_stamp, _taxonomy_next_check
+    with _TAXONOMY_LOCK:
+        path, interval = _taxonomy_settings()
+        stamp = _file_stamp(path)
+        if _taxonomy is None or stamp != _taxonomy_stamp:
+            loaded = None
+            if stamp is not None:
+                try:
+                    loaded = Taxonomy.load(path)
+                except Exception:
+                    logger.exception("Could not load compiled taxonomy %s", path)
+                if loaded is None and _taxonomy is not None:
+                    # Keep serving the version we have rather than dropping back to the JSON files.
+                    loaded = _taxonomy
+            _taxonomy = loaded or Taxonomy.from_files()
+            _taxonomy_stamp = stamp
+        _taxonomy_next_check = time.monotonic() + interval
+        return _taxonomy
+
+# Module attributes that follow the current taxonomy (``nlp_utils.ALIAS_LOOKUP`` etc.).
+_TAXONOMY_ATTRS = {
+    "CATEGORY_SKILLS": "category_skills",
+    "ALIAS_LOOKUP": "alias_lookup",
+    "SKILL_TO_CATEGORY": "skill_to_category",
+    "TAXONOMY_VERSION": "version",
+    "RESULTS_VERSION": "results_version",
+}
+
+def __getattr__(name: str):
+    if name in _TAXONOMY_ATTRS:
+        return getattr(get_taxonomy(), _TAXONOMY_ATTRS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def detect_seniority(text: str, with_evidence: bool = False, taxonomy: Taxonomy | None = None) -> dict:
+    scores, evidence = (taxonomy or get_taxonomy()).seniority.scan(text)
     predicted = max(scores, key=scores.get) if scores else "mid"
-    return {**scores, "predicted": predicted}
+    result = {**scores, "predicted": predicted}
+    if with_evidence:
+        result["evidence"] = evidence
+    return result
 
-def compare_skills_by_category(cv_text: str, jd_text: str):
-    cv_tokens, _ = tokenize_and_normalize(cv_text or "")
-    jd_tokens, _ = tokenize_and_normalize(jd_text or "")
-    cv_categories = map_tokens_to_categories(cv_tokens)
-    jd_categories = map_tokens_to_categories(jd_tokens)
+@dataclass
+class DocumentProfile:
+    tokens: list[str]
+    lang: str
+    counts: Counter = field(default_factory=Counter)
+    # Bitset over Taxonomy.skills. Only valid for the skill order it was built against (skills_digest):
+    # another taxonomy, or another build of the same one, may number skills differently.
+    skill_mask: int = 0
+    seniority: dict = field(default_factory=dict)
+    # Misspelled words counted as skills, for auditing: [{"token", "skill", "confidence", "count"}].
+    fuzzy_matches: list = field(default_factory=list)
+
+    @cached_property
+    def keyword_counts(self) -> list[tuple[str, int]]:
+        return self.counts.most_common()
+
+    @cached_property
+    def keywords_full(self) -> list[str]:
+        return [k for k, _ in self.keyword_counts]
+
+    def top_keywords(self, top_n: int = 20) -> list[str]:
+        return self.keywords_full[:top_n]
+
+def build_document_profile(text: str, lang: str | None = None, seniority: bool = True,
+                           taxonomy: Taxonomy | None = None) -> DocumentProfile:
+    tax = taxonomy or get_taxonomy()
+    DOCUMENT_CHARS.observe(len(text or ""))
+    fuzzy: list[tuple[str, str, float]] = []
+    with stage("tokenize"):
+        tokens_list, lang = tokenize_and_normalize(text or "", lang, tax, fuzzy)
+    level = {}
+    if seniority:
+        with stage("seniority"):
+            level = detect_seniority(text or "", with_evidence=True, taxonomy=tax)
+    counts = Counter(t for t in tokens_list if t in tax.skill_to_category)
+    return DocumentProfile(
+        tokens=tokens_list,
+        lang=lang,
+        counts=counts,
+        skill_mask=tax.skills_mask(counts),
+        seniority=level,
+        fuzzy_matches=[
+            {"token": word, "skill": skill, "confidence": confidence, "count": n}
+            for (word, skill, confidence), n in sorted(Counter(fuzzy).items())
+        ],
+    )
+
+PROFILE_CACHE = "document_profiles"
+_PROFILE_CACHE: OrderedDict[str, DocumentProfile] = OrderedDict()
+_PROFILE_CACHE_LOCK = threading.Lock()
+
+def _profile_cache_settings() -> tuple[int, bool]:
+    try:
+        return getattr(settings, "DOCUMENT_PROFILE_CACHE_SIZE", 0), PROFILE_CACHE in settings.CACHES
+    except ImproperlyConfigured:
+        return 0, False
+
+def document_profile(text: str, seniority: bool = True, taxonomy: Taxonomy | None = None) -> DocumentProfile:
+    """build_document_profile behind a per-process LRU and the shared ``document_profiles`` cache.
+
+    Profiles are keyed on the exact text (seniority evidence holds character spans), the taxonomy's
+    results version and its skill order (the skill mask's bit layout), so a taxonomy swap never serves
+    stale profiles. Callers must not mutate the result.
+    """
+    tax = taxonomy or get_taxonomy()
+    memory_size, shared = _profile_cache_settings()
+    if not text or not (memory_size or shared):
+        return build_document_profile(text, seniority=seniority, taxonomy=tax)
+    digest = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=20).hexdigest()
+    key = f"profile:{tax.results_version}:{tax.skills_digest}:{int(seniority)}:{digest}"
+
+    if memory_size:
+        with _PROFILE_CACHE_LOCK:
+            profile = _PROFILE_CACHE.get(key)
+            if profile is not None:
+                _PROFILE_CACHE.move_to_end(key)
+        CACHE_REQUESTS.inc(cache="profile_memory", result="miss" if profile is None else "hit")
+        if profile is not None:
+            return profile
+
+    profile = None
+    if shared:
+        with stage("profile_cache"):
+            cached = caches[PROFILE_CACHE].get(key)
+        CACHE_REQUESTS.inc(cache=PROFILE_CACHE, result="miss" if cached is None else "hit")
+        if cached is not None:
+            tokens, lang, counts, skill_mask, level, fuzzy_matches = cached
+            profile = DocumentProfile(tokens=tokens, lang=lang, counts=counts, skill_mask=skill_mask, seniority=level,
+                                      fuzzy_matches=fuzzy_matches)
+    if profile is None:
+        profile = build_document_profile(text, seniority=seniority, taxonomy=tax)
+        if shared:
+            caches[PROFILE_CACHE].set(key, (profile.tokens, profile.lang, profile.counts, profile.skill_mask,
+                                            profile.seniority, profile.fuzzy_matches))
+
+    if memory_size:
+        with _PROFILE_CACHE_LOCK:
+            _PROFILE_CACHE[key] = profile
+            while len(_PROFILE_CACHE) > memory_size:
+                _PROFILE_CACHE.popitem(last=False)
+    return profile
+
+def compare_profiles(cv_profile: DocumentProfile, jd_profile: DocumentProfile, taxonomy: Taxonomy | None = None):
+    tax = taxonomy or get_taxonomy()
+    cv_mask, jd_mask = cv_profile.skill_mask, jd_profile.skill_mask
     matched, missing, extra, category_scores = {}, {}, {}, {}
-    for cat_key, jd_sk in jd_categories.items():
-        cv_sk = cv_categories.get(cat_key, set())
-        matched[cat_key] = sorted(cv_sk & jd_sk)
-        missing[cat_key] = sorted(jd_sk - cv_sk)
-        total = len(jd_sk) or 1
-        category_scores[cat_key] = round(len(matched[cat_key]) / total * 100.0, 2)
-    for cat_key, cv_sk in cv_categories.items():
-        jd_sk = jd_categories.get(cat_key, set())
-        extra[cat_key] = sorted(cv_sk - jd_sk)
-    return matched, missing, extra, category_scores, cv_tokens, jd_tokens
+    for cat_key, cat_mask in tax.category_masks.items():
+        jd_sk = jd_mask & cat_mask
+        cv_sk = cv_mask & cat_mask
+        if jd_sk:
+            hits = cv_sk & jd_sk
+            matched[cat_key] = tax.mask_skills(hits)
+            missing[cat_key] = tax.mask_skills(jd_sk & ~cv_sk)
+            category_scores[cat_key] = round(hits.bit_count() / jd_sk.bit_count() * 100.0, 2)
+        if cv_sk:
+            extra[cat_key] = tax.mask_skills(cv_sk & ~jd_sk)
+    return matched, missing, extra, category_scores
+
+@lru_cache(maxsize=65536)
+def _category_percent(hits: int, size: int) -> float:
+    return round(hits / size * 100.0, 2)
+
+def score_masks(query_mask: int, masks, query_is_cv: bool = True, taxonomy: Taxonomy | None = None) -> list[float]:
+    """Match percent of one skill mask against many; the same numbers as analyze_profiles,
+    from popcounts over the category masks without building any skill lists."""
+    cat_masks = tuple((taxonomy or get_taxonomy()).category_masks.values())
+    scores = []
+    if query_is_cv:
+        for jd_mask in masks:
+            shared = query_mask & jd_mask
+            total, n_cats = 0.0, 0
+            for cat_mask in cat_masks:
+                jd_sk = jd_mask & cat_mask
+                if jd_sk:
+                    n_cats += 1
+                    hits = shared & cat_mask
+                    if hits:
+                        total += _category_percent(hits.bit_count(), jd_sk.bit_count())
+            scores.append(round(total / (n_cats or 1), 2))
+        return scores
+    # One JD against many CVs: its per-category masks and sizes are fixed.
+    jd_cats = [(jd_sk, jd_sk.bit_count()) for jd_sk in (query_mask & cat_mask for cat_mask in cat_masks) if jd_sk]
+    n_cats = len(jd_cats) or 1
+    for cv_mask in masks:
+        shared = cv_mask & query_mask
+        total = 0.0
+        if shared:
+            for jd_sk, size in jd_cats:
+                hits = shared & jd_sk
+                if hits:
+                    total += _category_percent(hits.bit_count(), size)
+        scores.append(round(total / n_cats, 2))
+    return scores
+
+def score_profiles(cv_profile: DocumentProfile, jd_profile: DocumentProfile) -> float:
+    return score_masks(cv_profile.skill_mask, [jd_profile.skill_mask])[0]
+
+def compare_skills_by_category(cv_text: str, jd_text: str):
+    tax = get_taxonomy()
+    cv_profile = document_profile(cv_text, taxonomy=tax)
+    jd_profile = document_profile(jd_text, taxonomy=tax)
+    matched, missing, extra, category_scores = compare_profiles(cv_profile, jd_profile, tax)
+    return matched, missing, extra, category_scores, cv_profile.tokens, jd_profile.tokens
 
 def get_result_text(match_percent: float) -> str:
     if match_percent >= 90: return "Excellent match — strong overlap across core skills."
@@ -202,24 +931,29 @@ def build_recommendations(missing_keywords: list[str], top_n: int = 5) -> list[s
     return [f"Add or highlight experience with {kw}." for kw in missing_keywords[:top_n]]
 
 def analyze_texts(cv_text: str, jd_text: str):
-    cv_keywords = extract_keywords(cv_text or "")
-    jd_keywords = extract_keywords(jd_text or "")
-    cv_keywords_full, cv_keyword_counts = extract_all_keywords(cv_text or "")
-    jd_keywords_full, jd_keyword_counts = extract_all_keywords(jd_text or "")
-    matched, missing, extra, category_scores, cv_tokens, jd_tokens = compare_skills_by_category(cv_text or "", jd_text or "")
+    tax = get_taxonomy()
+    cv_profile = document_profile(cv_text, taxonomy=tax)
+    jd_profile = document_profile(jd_text, taxonomy=tax)
+    return analyze_profiles(cv_profile, jd_profile)
+
+def analyze_profiles(cv_profile: DocumentProfile, jd_profile: DocumentProfile):
+    with stage("compare"):
+        matched, missing, extra, category_scores = compare_profiles(cv_profile, jd_profile)
     overall = round(sum(category_scores.values()) / (len(category_scores) or 1), 2)
-    jd_level = detect_seniority(jd_text or "")
-    cv_level = detect_seniority(cv_text or "")
     matched_keywords = sorted({sk for v in matched.values() for sk in v})
     missing_keywords = sorted({sk for v in missing.values() for sk in v})
-    extra_keywords = sorted(set(cv_tokens) - set(jd_tokens))
+    extra_keywords = sorted(set(cv_profile.tokens) - set(jd_profile.tokens))
+    jd_level = dict(jd_profile.seniority)
+    cv_level = dict(cv_profile.seniority)
+    jd_evidence = jd_level.pop("evidence", [])
+    cv_evidence = cv_level.pop("evidence", [])
     return {
-        "cv_keywords": cv_keywords,
-        "jd_keywords": jd_keywords,
-        "cv_keywords_full": cv_keywords_full,
-        "jd_keywords_full": jd_keywords_full,
-        "cv_keyword_counts": cv_keyword_counts,
-        "jd_keyword_counts": jd_keyword_counts,
+        "cv_keywords": cv_profile.top_keywords(),
+        "jd_keywords": jd_profile.top_keywords(),
+        "cv_keywords_full": cv_profile.keywords_full,
+        "jd_keywords_full": jd_profile.keywords_full,
+        "cv_keyword_counts": cv_profile.keyword_counts,
+        "jd_keyword_counts": jd_profile.keyword_counts,
         "matched_by_category": matched,
         "missing_by_category": missing,
         "extra_by_category": extra,
@@ -231,8 +965,10 @@ def analyze_texts(cv_text: str, jd_text: str):
         "overall": overall,
         "ai_result_text": get_result_text(overall),
         "jd_level": jd_level,
-        "jd_level_signals": [],
+        "jd_level_signals": jd_evidence,
         "cv_level": cv_level,
         "recommendations": build_recommendations(missing_keywords),
-        "evidence": {},
+        "evidence": {"jd_level": jd_evidence, "cv_level": cv_evidence},
+        "cv_fuzzy_matches": cv_profile.fuzzy_matches,
+        "jd_fuzzy_matches": jd_profile.fuzzy_matches,
     }
\ No newline at end of file
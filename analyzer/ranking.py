@@ -0,0 +1,89 @@
+import atexit
+import heapq
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+from .nlp_utils import DocumentProfile, analyze_profiles, document_profile, score_masks
+
+# Below this many candidates, shipping chunks to the pool costs more than it saves.
+PARALLEL_THRESHOLD = 200
+CHUNK_SIZE = 64
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ProcessPoolExecutor | None:
+    # One pool per web worker, forked on the first big ranking and reused after that (its processes keep their
+    # profile caches warm). None when RANKING_PROCESSES is 0 or 1, or in a daemonic process, which can't fork.
+    global _executor
+    if settings.RANKING_PROCESSES <= 1 or multiprocessing.current_process().daemon:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=settings.RANKING_PROCESSES)
+        return _executor
+
+
+def _reset_executor(executor: ProcessPoolExecutor):
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+@atexit.register
+def _shutdown_executor():
+    if _executor is not None:
+        _reset_executor(_executor)
+
+
+def _score_chunk(query: DocumentProfile, query_is_cv: bool, chunk: list[tuple[int, str]]) -> list[tuple[float, int]]:
+    masks = [document_profile(text, seniority=False).skill_mask for _, text in chunk]
+    scores = score_masks(query.skill_mask, masks, query_is_cv)
+    return [(score, idx) for score, (idx, _) in zip(scores, chunk)]
+
+
+def rank_documents(query_text: str, candidates, query_is_cv: bool = True, top_k: int = 10) -> list[dict]:
+    """Score one CV against many JDs (or one JD against many CVs) and return the top_k best matches.
+
+    ``candidates`` is an iterable of ``(key, text)`` pairs; the key is echoed back in the results. Batches of
+    PARALLEL_THRESHOLD or more are scored on the shared pool of RANKING_PROCESSES processes.
+    """
+    items = list(candidates)
+    query = document_profile(query_text, seniority=False)
+    indexed = [(idx, text) for idx, (_, text) in enumerate(items)]
+    chunks = [indexed[i:i + CHUNK_SIZE] for i in range(0, len(indexed), CHUNK_SIZE)]
+
+    scored: list[tuple[float, int]] = []
+    executor = _get_executor() if len(items) >= PARALLEL_THRESHOLD else None
+    if executor is not None:
+        try:
+            for part in executor.map(_score_chunk, [query] * len(chunks), [query_is_cv] * len(chunks), chunks):
+                scored.extend(part)
+        except BrokenProcessPool:
+            # A pool process died (e.g. killed for memory); the next ranking gets a fresh pool.
+            _reset_executor(executor)
+            executor, scored = None, []
+    if executor is None:
+        for chunk in chunks:
+            scored.extend(_score_chunk(query, query_is_cv, chunk))
+
+    rows = []
+    for score, idx in heapq.nlargest(top_k, scored, key=lambda s: s[0]):
+        key, text = items[idx]
+        profile = document_profile(text, seniority=False)
+        cv_profile, jd_profile = (query, profile) if query_is_cv else (profile, query)
+        results = analyze_profiles(cv_profile, jd_profile)
+        rows.append({
+            "key": key,
+            "match_percent": score,
+            "matched_keywords": results["matched_keywords"],
+            "missing_keywords": results["missing_keywords"],
+        })
+    return rows
@@ -0,0 +1,46 @@
+from . import nlp_utils
+from .models import Analysis, DocumentSkill
+
+PAGE_SIZE = 25
+
+
+def parse_skills(raw: str) -> list[str]:
+    """Split a comma-separated list and map each entry to its canonical skill ("k8s" -> "kubernetes")."""
+    skills = []
+    for term in (raw or "").split(","):
+        t = nlp_utils.normalize_word(term)
+        if t:
+            canonical = nlp_utils.ALIAS_LOOKUP.get(t, t)
+            if canonical not in skills:
+                skills.append(canonical)
+    return skills
+
+
+def search_analyses(user, kind: str = DocumentSkill.KIND_CV, all_skills=(), any_skills=(), none_skills=(),
+                    cursor: int | None = None, page_size: int = PAGE_SIZE):
+    """Return (analyses, next_cursor) whose CV or JD has all of ``all_skills``, at least one of
+    ``any_skills`` and none of ``none_skills``. Pages are keyed on descending pk."""
+    qs = Analysis.objects.filter(user=user)
+    if DocumentSkill.uses_native_index(qs.db):
+        field = f"{kind}_skills"
+        if all_skills:
+            qs = qs.filter(**{f"{field}__contains": list(all_skills)})
+        if any_skills:
+            qs = qs.filter(**{f"{field}__has_any_keys": list(any_skills)})
+        if none_skills:
+            qs = qs.exclude(**{f"{field}__has_any_keys": list(none_skills)})
+    else:
+        rows = DocumentSkill.objects.filter(user=user, kind=kind)
+        for skill in all_skills:
+            qs = qs.filter(pk__in=rows.filter(skill=skill).values("analysis_id"))
+        if any_skills:
+            qs = qs.filter(pk__in=rows.filter(skill__in=any_skills).values("analysis_id"))
+        if none_skills:
+            qs = qs.exclude(pk__in=rows.filter(skill__in=none_skills).values("analysis_id"))
+
+    if cursor:
+        qs = qs.filter(pk__lt=cursor)
+    qs = qs.only("pk", "job_title", "company", "created_at", "match_percent", "status", f"{kind}_skills")
+    page = list(qs.order_by("-pk")[:page_size + 1])
+    next_cursor = page[page_size - 1].pk if len(page) > page_size else None
+    return page[:page_size], next_cursor
@@ -0,0 +1,61 @@
+import os
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .metrics import STORED_FILES
+from .models import StoredBlob
+from .utils import _content_digest
+
+BLOB_DIR = "blobs"
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Stores each upload under the SHA-256 of its bytes, so identical files are written once.
+
+    Every save takes a reference on the blob (counted in StoredBlob) and every delete drops one; the
+    file goes when the last reference does. The extension is kept in the blob name, because
+    extraction picks the parser by it. Files saved before this storage keep their names and, having no
+    count, are deleted with the one analysis that owns them.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # Only the extension of the upload's name is used; the stored name comes from the content.
+        return name
+
+    def _save(self, name, content):
+        digest = _content_digest(content)
+        # Capped so the name fits the FileField's 100 characters.
+        extension = os.path.splitext(name)[1].lower()[:16]
+        blob = f"{BLOB_DIR}/{digest[:2]}/{digest}{extension}"
+        with transaction.atomic():
+            # Writing first takes the row lock (the database lock on SQLite) before anything is read, so a
+            # concurrent delete can't remove the file between the check and the write.
+            shared = StoredBlob.objects.filter(pk=blob).update(refs=F("refs") + 1)
+            if not shared:
+                try:
+                    with transaction.atomic():
+                        StoredBlob.objects.create(name=blob, size=content.size or 0, refs=1)
+                except IntegrityError:
+                    # Another upload of the same bytes created it first.
+                    shared = StoredBlob.objects.filter(pk=blob).update(refs=F("refs") + 1)
+            if not shared or not self.exists(blob):
+                # Written aside and renamed, so a reader never sees half a blob.
+                temporary = super()._save(f"{blob}.{uuid.uuid4().hex}.tmp", content)
+                os.replace(self.path(temporary), self.path(blob))
+                STORED_FILES.inc(result="written")
+            else:
+                STORED_FILES.inc(result="deduplicated")
+        return blob
+
+    def delete(self, name):
+        if not name:
+            raise ValueError("The name must be given to delete().")
+        with transaction.atomic():
+            counted = StoredBlob.objects.filter(pk=name).update(refs=F("refs") - 1)
+            if counted and StoredBlob.objects.filter(pk=name, refs__gt=0).exists():
+                return
+            StoredBlob.objects.filter(pk=name).delete()
+            super().delete(name)
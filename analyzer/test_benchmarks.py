@@ -0,0 +1,52 @@
+"""pytest-benchmark suite for extraction, phrase matching, seniority and scoring.
+
+Marked ``benchmark``, which pytest.ini leaves out of the default run; run them with
+``pytest -m benchmark analyzer/test_benchmarks.py`` and add ``--benchmark-autosave`` / ``--benchmark-compare`` to
+track regressions. ``manage.py bench_analyzer`` times the same stages, with larger sizes, without pytest.
+"""
+from functools import lru_cache
+
+import pytest
+
+from . import nlp_utils
+from .benchmarks import (
+    CURRENT_TAXONOMY, EXTRACT_FORMATS, TEXT_STAGES, _FIXTURE_WRITERS, _extract, _no_extraction_cache, _profile_cache,
+    _text_benchmarks, installed_taxonomy, size_label, synthetic_document, synthetic_taxonomy,
+)
+
+pytest.importorskip("pytest_benchmark")
+
+pytestmark = pytest.mark.benchmark
+
+TEXT_SIZES = (1_000, 10_000, 100_000)
+TAXONOMIES = (CURRENT_TAXONOMY, 1_000, 10_000)
+EXTRACT_SIZES = (1_000, 10_000)
+
+
+@lru_cache(maxsize=None)
+def _taxonomy(aliases):
+    return nlp_utils.get_taxonomy() if aliases == CURRENT_TAXONOMY else synthetic_taxonomy(aliases)
+
+
+@pytest.mark.parametrize("size", TEXT_SIZES, ids=size_label)
+@pytest.mark.parametrize("aliases", TAXONOMIES, ids=lambda aliases: f"aliases={aliases}")
+@pytest.mark.parametrize("stage", TEXT_STAGES)
+def test_text_stage(benchmark, stage, aliases, size):
+    taxonomy = _taxonomy(aliases)
+    [(_, _, _, func)] = _text_benchmarks([stage], taxonomy, aliases, [size])
+    benchmark.group = stage
+    with installed_taxonomy(taxonomy), _profile_cache(stage == "analyze_texts_cached"):
+        result = benchmark(func)
+    assert result
+
+
+@pytest.mark.parametrize("size", EXTRACT_SIZES, ids=size_label)
+@pytest.mark.parametrize("fmt", EXTRACT_FORMATS)
+def test_extract_text_any(benchmark, tmp_path, fmt, size):
+    text = synthetic_document(nlp_utils.get_taxonomy(), size, seed=size)
+    path = tmp_path / f"fixture-{size}.{fmt}"
+    _FIXTURE_WRITERS[fmt](path, text)
+    benchmark.group = "extract_text_any"
+    with _no_extraction_cache():
+        extracted = benchmark(_extract, path)
+    assert extracted.split()[:50] == text.split()[:50]
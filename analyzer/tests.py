@@ -1,3 +1,655 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import re
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils.http import urlsafe_base64_encode
+
+from . import nlp_utils
+from .benchmarks import synthetic_document, write_docx
+from .history import encode_cursor, history_page
+from .importer import _write_batch, read_manifest, run_import
+from .jobs import MAX_ATTEMPTS, claim_next_job, enqueue_analysis, process_job
+from .loadtest import Recorder, Session, summarize
+from .management.commands.analysis_worker import _work
+from . import ranking
+from .models import Analysis, AnalysisJob, AnalysisStatus, StoredBlob
+from .nlp_utils import FuzzyIndex, PhraseMatcher, SeniorityDetector, Taxonomy, _is_typo, _placeholder_for
+from .storage import ContentAddressedStorage
+from .utils import ExtractionError, extract_text_any
+
+
+def _regex_placeholders(alias_lookup: dict[str, str], text: str) -> str:
+    # The per-alias re.sub cascade PhraseMatcher replaced, kept as the reference it must agree with.
+    pairs = sorted(alias_lookup.items(), key=lambda kv: len(kv[0]), reverse=True)
+    for alias, canon in pairs:
+        if any(ch in alias for ch in " -_/."):
+            parts = [re.escape(p) for p in re.split(r"[ \t_/-]+", alias) if p]
+            if parts:
+                pattern = re.compile(r"\b" + r"[ \t_/.\-]+".join(parts) + r"\b", re.IGNORECASE)
+                text = pattern.sub(_placeholder_for(canon), text)
+    return text
+
+
+def _matcher_placeholders(matcher: PhraseMatcher, text: str) -> str:
+    pieces, pos = [], 0
+    for start, end, canon in matcher.find_spans(text):
+        pieces += [text[pos:start], _placeholder_for(canon)]
+        pos = end
+    return "".join(pieces) + text[pos:]
+
+
+class PhraseMatcherTests(SimpleTestCase):
+    ALIASES = {
+        "machine learning": "machine learning",
+        "deep learning": "deep learning",
+        "learning rate": "learning rate",
+        "machine learning engineer": "ml engineer",
+        "ruby on rails": "ruby on rails",
+        "rails": "ruby on rails",
+        "ci/cd": "ci cd",
+        "ci cd pipeline": "ci cd",
+        "asp.net core": "asp.net",
+        ".net core": ".net",
+        "node.js": "node.js",
+        "google cloud platform": "gcp",
+        "cloud platform": "cloud",
+    }
+
+    def test_overlapping_and_multi_word_aliases_match_the_regex_cascade(self):
+        matcher = PhraseMatcher(self.ALIASES)
+        texts = [
+            "Machine learning engineer with deep learning rate tuning experience.",
+            "Deep-learning and machine_learning; learning rate schedules.",
+            "Ruby on Rails, ruby-on-rails and RUBY / ON / RAILS apps.",
+            "Built CI/CD and a ci cd pipeline; also ci - cd.",
+            "ASP.NET Core and .NET Core on Google Cloud Platform, not just any cloud platform.",
+            "node.js, node . js and nodejs",
+            "machine learningengineer, xmachine learning, machine  learning",
+            "",
+        ]
+        for text in texts:
+            with self.subTest(text=text):
+                self.assertEqual(_matcher_placeholders(matcher, text), _regex_placeholders(self.ALIASES, text))
+
+    def test_configured_taxonomy_matches_the_regex_cascade(self):
+        taxonomy = nlp_utils.get_taxonomy()
+        for seed in range(5):
+            text = synthetic_document(taxonomy, 4_000, seed=seed)
+            with self.subTest(seed=seed):
+                self.assertEqual(nlp_utils._apply_phrase_placeholders(text),
+                                 _regex_placeholders(taxonomy.alias_lookup, text))
+
+
+class SeniorityDetectorTests(SimpleTestCase):
+    def test_regexes_with_flags_backreferences_and_named_groups_are_scanned(self):
+        detector = SeniorityDetector({
+            "senior": {"regex": [r"(?i)\bstaff engineer\b", r"\b(lead)\W+\1\b", r"\b(?P<years>[5-9])\+ years\b"]},
+            "mid": {"regex": [r"\b(2|3)\+? years\b"], "phrases": ["mid-level"]},
+        })
+        self.assertEqual(len(detector.regexes), 4)
+        scores, evidence = detector.scan("Staff engineer, lead lead, 7+ years; mid-level with 3 years elsewhere.")
+        self.assertEqual(scores["senior"], 3)
+        self.assertEqual(scores["mid"], 2)
+        starts = [e["span"][0] for e in evidence]
+        self.assertEqual(starts, sorted(starts))
+        self.assertEqual([e["text"] for e in evidence],
+                         ["staff engineer", "lead lead", "7+ years", "mid-level", "3 years"])
+
+    def test_overlapping_phrases_and_regexes_each_count(self):
+        detector = SeniorityDetector({
+            "senior": {"phrases": ["tech lead", "lead"], "regex": [r"\b5\+ years\b", r"\b[5-9]\+? years\b"]},
+            "mid": {"phrases": ["mid-level", "mid"]},
+        })
+        scores, evidence = detector.scan("Tech lead, mid-level, 5+ years.")
+        # "lead" inside "tech lead" and "mid" inside "mid-level" still count, as does every regex matching "5+ years".
+        self.assertEqual(scores["senior"], 4)
+        self.assertEqual(scores["mid"], 2)
+        self.assertEqual([e["text"] for e in evidence],
+                         ["tech lead", "lead", "mid-level", "mid", "5+ years", "5+ years"])
+        # A phrase scores once per document, however often it appears.
+        self.assertEqual(detector.scan("lead, lead and lead")[0]["senior"], 1)
+
+
+class FuzzyMatchTests(SimpleTestCase):
+    def test_typos_of_configured_skills_are_read_as_the_skill(self):
+        taxonomy = nlp_utils.get_taxonomy()
+        for word, skill in [("kubernets", "kubernetes"), ("kuberentes", "kubernetes"), ("javscript", "javascript"),
+                            ("typescirpt", "typescript"), ("postgress", "postgresql"), ("Kubernets,", "kubernetes")]:
+            with self.subTest(word=word):
+                hit = taxonomy.fuzzy_token(word)
+                self.assertIsNotNone(hit)
+                self.assertEqual(hit[1], skill)
+                self.assertGreaterEqual(hit[2], nlp_utils.FUZZY_MIN_CONFIDENCE)
+
+    def test_short_words_and_real_near_misses_are_not_typos(self):
+        taxonomy = nlp_utils.get_taxonomy()
+        # Under FUZZY_MIN_LENGTH, a different first letter, or not a word.
+        for word in ("pythn", "rect", "dokcer", "mongdb", "cubernetes", "kubernet3s"):
+            with self.subTest(word=word):
+                self.assertIsNone(taxonomy.fuzzy_token(word))
+        # Real words one edit from a skill: plurals, "-ing" forms and short substitutions.
+        for word, alias in [("systems", "systemd"), ("action", "actions"), ("testing", "testng"),
+                            ("leaving", "leading"), ("reacted", "react"), ("pythons", "python")]:
+            with self.subTest(word=word, alias=alias):
+                self.assertFalse(_is_typo(word, alias))
+                self.assertIsNone(taxonomy.fuzzy_token(word))
+        for word, alias in [("postgress", "postgres"), ("kuberentes", "kubernetes"), ("dockre", "docker")]:
+            with self.subTest(word=word, alias=alias):
+                self.assertTrue(_is_typo(word, alias))
+
+    def test_real_words_and_other_tools_are_not_typos(self):
+        taxonomy = nlp_utils.get_taxonomy()
+        # Other forms of a skill, English words and other tools, each one edit from an alias.
+        for word in ("composer", "composers", "expresses", "sketchy", "cython", "gating", "sparing", "auctions",
+                     "fireball", "lambada"):
+            with self.subTest(word=word):
+                self.assertIsNone(taxonomy.fuzzy_token(word))
+        words = "Composer of expresses, a sketchy Cython gating report on sparing auctions."
+        self.assertEqual(nlp_utils.build_document_profile(words, seniority=False, taxonomy=taxonomy).fuzzy_matches, [])
+
+    def test_stoplist_and_inflections_are_checked_by_the_index(self):
+        index = FuzzyIndex({"compose": "jetpack compose", "kubernetes": "kubernetes"}, frozenset({"kubernets"}))
+        for word in ("composer", "composes", "composing", "composed", "kubernets"):
+            with self.subTest(word=word):
+                self.assertIsNone(index.lookup(word))
+        self.assertEqual(index.lookup("kuberentes")[0], "kubernetes")
+
+    def test_a_word_near_two_skills_is_left_alone(self):
+        index = FuzzyIndex({"terraform": "terraform", "terraforms": "terraform", "kotlinx": "kotlinx",
+                            "kotliny": "kotliny", "go": "go"})
+        self.assertEqual(index.lookup("terrafrom")[0], "terraform")
+        self.assertIsNone(index.lookup("kotlinz"))
+        self.assertIsNone(index.lookup("gox"))
+
+
+class DocumentProfileCacheTests(SimpleTestCase):
+    def test_builds_with_another_skill_order_do_not_share_skill_masks(self):
+        compiled = Taxonomy.from_files(previous_skills=["retired skill"])
+        fallback = Taxonomy.from_files()
+        self.assertEqual(compiled.results_version, fallback.results_version)
+        self.assertNotEqual(compiled.skills_digest, fallback.skills_digest)
+        shared = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "profile-test"}
+        text = synthetic_document(fallback, 2_000, seed=1)
+        with override_settings(DOCUMENT_PROFILE_CACHE_SIZE=0,
+                               CACHES={**settings.CACHES, nlp_utils.PROFILE_CACHE: shared}):
+            from_compiled = nlp_utils.document_profile(text, taxonomy=compiled)
+            from_fallback = nlp_utils.document_profile(text, taxonomy=fallback)
+        self.assertTrue(from_fallback.skill_mask)
+        self.assertEqual(fallback.mask_skills(from_fallback.skill_mask),
+                         compiled.mask_skills(from_compiled.skill_mask))
+
+
+def _pending_analysis(user, **kwargs) -> Analysis:
+    analysis = Analysis.objects.create(user=user, cv_text="Python, Django and Docker developer.",
+                                       jd_text="We need Python and Kubernetes.", status=AnalysisStatus.PENDING,
+                                       **kwargs)
+    enqueue_analysis(analysis)
+    return analysis
+
+
+class ClaimNextJobTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("worker-test")
+
+    def test_concurrent_workers_claim_each_job_once(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("In-memory SQLite locks tables instead of letting concurrent writers wait.")
+        jobs = {_pending_analysis(self.user).job.pk for _ in range(12)}
+        claimed, errors = [], []
+
+        def worker(name):
+            try:
+                while (job := claim_next_job(name, batch=3)) is not None:
+                    claimed.append(job.pk)
+            except Exception as exc:  # surfaced below; a thread can't fail the test itself
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(f"w{i}",)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(sorted(claimed), sorted(jobs))
+        self.assertEqual(AnalysisJob.objects.filter(status=AnalysisStatus.RUNNING, attempts=1).count(), 12)
+
+    def test_stale_running_job_is_claimed_again(self):
+        job = _pending_analysis(self.user).job
+        self.assertEqual(claim_next_job("a").pk, job.pk)
+        self.assertIsNone(claim_next_job("b"))
+        AnalysisJob.objects.filter(pk=job.pk).update(locked_at=job.created_at.replace(year=2000))
+        again = claim_next_job("b")
+        self.assertEqual((again.pk, again.worker, again.attempts), (job.pk, "b", 2))
+
+
+def _docx_upload(directory: Path, text: str) -> ContentFile:
+    path = directory / "cv.docx"
+    write_docx(path, text)
+    return ContentFile(path.read_bytes(), name="cv.docx")
+
+
+class FileJobTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("worker-test")
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        nocache = {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+        override = override_settings(MEDIA_ROOT=self.root, CACHES={**settings.CACHES, "extracted_text": nocache})
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_multi_process_worker_extracts_uploaded_files(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("Worker processes can't see an in-memory SQLite database.")
+        analyses = []
+        for i in range(3):
+            analysis = Analysis.objects.create(user=self.user, jd_text="We need Python and Kubernetes.",
+                                               status=AnalysisStatus.PENDING)
+            analysis.cv_file.save("cv.docx", _docx_upload(self.root, f"CV {i}: Python, Django and Kubernetes."))
+            enqueue_analysis(analysis)
+            analyses.append(analysis)
+        call_command("analysis_worker", processes=2, once=True, poll_interval=0, stdout=io.StringIO())
+        for analysis in analyses:
+            analysis.refresh_from_db()
+            self.assertEqual((analysis.status, analysis.error), (AnalysisStatus.DONE, ""))
+            self.assertIn("kubernetes", analysis.cv_skills)
+
+    def test_daemonic_process_extracts_in_process(self):
+        upload = _docx_upload(self.root, "Python and Kubernetes.")
+        daemonic = mock.Mock(daemon=True)
+        with mock.patch("analyzer.utils.multiprocessing.current_process", return_value=daemonic), \
+                mock.patch("analyzer.utils._get_pool", side_effect=AssertionError("no children")):
+            self.assertIn("Kubernetes", extract_text_any(upload))
+
+    def test_pool_failure_is_not_reported_as_an_unreadable_file(self):
+        upload = _docx_upload(self.root, "Python and Kubernetes.")
+        with mock.patch("analyzer.utils._get_pool", side_effect=OSError("can't fork")), \
+                self.assertRaises(OSError):
+            extract_text_any(upload)
+
+
+class ProcessJobTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("worker-test")
+
+    def _claim(self, analysis):
+        job = claim_next_job("test")
+        self.assertEqual(job.analysis_id, analysis.pk)
+        return job
+
+    def test_success_stores_results(self):
+        analysis = _pending_analysis(self.user)
+        process_job(self._claim(analysis))
+        analysis.refresh_from_db()
+        self.assertEqual(analysis.status, AnalysisStatus.DONE)
+        self.assertIn("python", analysis.cv_skills)
+        self.assertEqual(AnalysisJob.objects.get(analysis=analysis).status, AnalysisStatus.DONE)
+
+    def test_unexpected_error_is_retried_then_fails(self):
+        analysis = _pending_analysis(self.user)
+        with mock.patch("analyzer.jobs.run_analysis", side_effect=RuntimeError("boom")):
+            for attempt in range(1, MAX_ATTEMPTS + 1):
+                process_job(self._claim(analysis))
+                job = AnalysisJob.objects.get(analysis=analysis)
+                self.assertEqual(job.last_error, "RuntimeError: boom")
+                expected = AnalysisStatus.FAILED if attempt == MAX_ATTEMPTS else AnalysisStatus.PENDING
+                self.assertEqual((job.status, job.attempts), (expected, attempt))
+                analysis.refresh_from_db()
+                self.assertEqual(analysis.status, expected)
+        self.assertIsNone(claim_next_job("test"))
+
+    def test_extraction_error_fails_without_retry(self):
+        analysis = _pending_analysis(self.user)
+        with mock.patch("analyzer.jobs.run_analysis", side_effect=ExtractionError("Unreadable PDF.")):
+            process_job(self._claim(analysis))
+        analysis.refresh_from_db()
+        self.assertEqual((analysis.status, analysis.error), (AnalysisStatus.FAILED, "Unreadable PDF."))
+        self.assertEqual(AnalysisJob.objects.get(analysis=analysis).status, AnalysisStatus.FAILED)
+
+    def test_analysis_deleted_while_running_stays_deleted(self):
+        analysis = _pending_analysis(self.user)
+        job = self._claim(analysis)
+        Analysis.objects.filter(pk=analysis.pk).delete()
+        process_job(job)
+        self.assertFalse(Analysis.objects.filter(pk=analysis.pk).exists())
+        self.assertFalse(AnalysisJob.objects.filter(pk=job.pk).exists())
+
+    def test_worker_survives_a_failing_job(self):
+        _pending_analysis(self.user)
+        with mock.patch("analyzer.jobs.process_job", side_effect=RuntimeError("boom")), \
+                mock.patch("django.setup"), self.assertLogs("analyzer.management.commands.analysis_worker"):
+            _work("test", 0, once=True)
+
+
+class HistoryPageTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("history-test", password="pw")
+        other = User.objects.create_user("someone-else")
+        Analysis.objects.create(user=other, cv_text="cv", jd_text="jd")
+        # Two pairs share a timestamp, so the pk tie-break decides the order across a page boundary.
+        stamps = [datetime(2025, 3, 1, 12, tzinfo=timezone.utc)] * 2 + [
+            datetime(2025, 2, 10, 12, tzinfo=timezone.utc), datetime(2025, 2, 3, 12, tzinfo=timezone.utc),
+        ] + [datetime(2025, 1, 5, 12, tzinfo=timezone.utc)] * 2
+        self.expected = []
+        for stamp in stamps:
+            analysis = Analysis.objects.create(user=self.user, cv_text="cv", jd_text="jd")
+            Analysis.objects.filter(pk=analysis.pk).update(created_at=stamp)
+            self.expected.append((stamp, analysis.pk))
+        self.expected = [pk for _, pk in sorted(self.expected, reverse=True)]
+
+    def _walk(self, page_size):
+        pages, cursor = [], None
+        while True:
+            page, cursor = history_page(self.user, cursor, page_size)
+            pages.append(page)
+            if cursor is None:
+                return pages
+
+    def test_pages_cover_every_analysis_once_in_order(self):
+        for page_size in (1, 2, 3, 4, 6, 20):
+            with self.subTest(page_size=page_size):
+                pages = self._walk(page_size)
+                self.assertEqual([a.pk for page in pages for a in page], self.expected)
+                self.assertTrue(all(pages))
+                self.assertEqual(len(pages), -(-len(self.expected) // page_size))
+
+    def test_month_headers_continue_across_pages(self):
+        headers = [a.month_header for page in self._walk(3) for a in page]
+        self.assertEqual(headers, ["March 2025", None, "February 2025", None, "January 2025", None])
+
+    def test_bad_cursor_starts_from_the_first_page(self):
+        first, _ = history_page(self.user, page_size=2)
+        naive = urlsafe_base64_encode(f"{first[0].created_at.replace(tzinfo=None).isoformat()}|{first[0].pk}".encode())
+        for cursor in ("not-a-cursor", "", encode_cursor(first[0])[:-3] + "$$$", "MjAyNXxhYmM", naive):
+            with self.subTest(cursor=cursor):
+                page, _ = history_page(self.user, cursor, page_size=2)
+                self.assertEqual([a.pk for a in page], [a.pk for a in first])
+        self.client.login(username="history-test", password="pw")
+        for cursor in ("%%%", naive):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(reverse("analysis_history"), {"cursor": cursor})
+                self.assertEqual(response.status_code, 200)
+
+
+class AnalysisExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("export-test")
+        Analysis.objects.create(user=User.objects.create_user("someone-else"), cv_text="cv", jd_text="jd")
+        self.pks = [
+            Analysis.objects.create(
+                user=self.user, cv_text="cv", jd_text="jd", job_title=f"Role {i}", company="Acme, Inc.",
+                status=AnalysisStatus.DONE, match_percent=10 * i, cv_skills=["python", "django"], jd_skills=["python"],
+                results={"matched_keywords": ["python"], "missing_keywords": [], "extra_keywords": ["django"],
+                         "category_scores": {"languages": 100}},
+            ).pk
+            for i in range(30)
+        ]
+        # Small blocks, so the export arrives as several chunks rather than one.
+        patcher = mock.patch("analyzer.export.BLOCK_SIZE", 256)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _check(self, response, fmt, compress, chunks):
+        self.assertTrue(response.streaming)
+        self.assertGreater(len(chunks), 1)
+        self.assertIn(f".{fmt}{'.gz' if compress else ''}\"", response["Content-Disposition"])
+        body = b"".join(chunks)
+        text = (gzip.decompress(body) if compress else body).decode()
+        if fmt == "csv":
+            rows = list(csv.DictReader(io.StringIO(text)))
+            self.assertEqual(rows[0]["company"], "Acme, Inc.")
+            self.assertEqual(rows[0]["cv_skills"], "python; django")
+            self.assertEqual(json.loads(rows[0]["category_scores"]), {"languages": 100})
+        else:
+            rows = [json.loads(line) for line in text.splitlines()]
+            self.assertEqual(rows[0]["extra_keywords"], ["django"])
+        self.assertEqual([int(row["id"]) for row in rows], self.pks)
+
+    def test_wsgi_streams_every_format(self):
+        self.client.force_login(self.user)
+        for fmt in ("csv", "jsonl"):
+            for compress in (False, True):
+                with self.subTest(fmt=fmt, gzip=compress):
+                    params = {"format": fmt, **({"gzip": "1"} if compress else {})}
+                    response = self.client.get(reverse("analysis_export"), params)
+                    self.assertFalse(response.is_async)
+                    self._check(response, fmt, compress, list(response.streaming_content))
+
+    async def test_asgi_streams_without_buffering(self):
+        await self.async_client.aforce_login(self.user)
+        for fmt in ("csv", "jsonl"):
+            for compress in (False, True):
+                with self.subTest(fmt=fmt, gzip=compress):
+                    params = {"format": fmt, **({"gzip": "1"} if compress else {})}
+                    response = await self.async_client.get(reverse("analysis_export"), params)
+                    self.assertTrue(response.is_async)
+                    self._check(response, fmt, compress, [chunk async for chunk in response.streaming_content])
+
+
+class _SlowOnceHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path == "/slow":
+            time.sleep(0.5)
+        try:
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"ok")
+        except OSError:
+            pass  # the client gave up on /slow and closed the connection
+
+    def log_message(self, *args):
+        pass
+
+
+class LoadTestSessionTests(SimpleTestCase):
+    def test_timed_out_request_does_not_break_the_session(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _SlowOnceHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        session = Session(f"http://127.0.0.1:{server.server_port}", timeout=0.1)
+        self.addCleanup(session.close)
+        self.assertEqual(session.request("GET", "/fast")[0], 200)
+        with self.assertRaises(TimeoutError):
+            session.request("GET", "/slow")
+        self.assertEqual(session.request("GET", "/fast")[0], 200)
+
+    def test_failed_requests_stay_out_of_the_latencies(self):
+        recorder = Recorder()
+        recorder.started, recorder.finished = 0.0, 10.0
+        for seconds in (0.2, 0.4):
+            recorder.record("detail", seconds)
+        recorder.record("detail", None, "TimeoutError")
+        recorder.record("upload", None, "ConnectionRefusedError")
+        endpoints = summarize(recorder)["endpoints"]
+        self.assertEqual((endpoints["detail"]["requests"], endpoints["detail"]["errors"]), (3, 1))
+        self.assertEqual((endpoints["detail"]["p50"], endpoints["detail"]["max"]), (0.2, 0.4))
+        self.assertEqual((endpoints["upload"]["requests"], endpoints["upload"]["errors"]), (1, 1))
+        self.assertIsNone(endpoints["upload"]["p99"])
+
+
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        self.storage = ContentAddressedStorage(location=self.root)
+
+    def _files(self):
+        return sorted(str(p.relative_to(self.root)) for p in self.root.rglob("*") if p.is_file())
+
+    def _refs(self, name):
+        return StoredBlob.objects.filter(pk=name).values_list("refs", flat=True).first()
+
+    def test_identical_uploads_share_one_blob(self):
+        first = self.storage.save("uploads/cv/alice.PDF", ContentFile(b"%PDF same bytes"))
+        second = self.storage.save("uploads/jd/bob.pdf", ContentFile(b"%PDF same bytes"))
+        other = self.storage.save("uploads/cv/carol.pdf", ContentFile(b"%PDF other bytes"))
+        self.assertEqual(first, second)
+        self.assertRegex(first, r"^blobs/[0-9a-f]{2}/[0-9a-f]{64}\.pdf$")
+        self.assertNotEqual(first, other)
+        self.assertEqual((self._refs(first), self._refs(other)), (2, 1))
+        self.assertEqual(self._files(), sorted([first, other]))
+        self.assertEqual(self.storage.open(first).read(), b"%PDF same bytes")
+
+    def test_blob_is_removed_with_its_last_reference(self):
+        name = self.storage.save("cv.pdf", ContentFile(b"shared"))
+        self.storage.save("cv.pdf", ContentFile(b"shared"))
+        self.storage.delete(name)
+        self.assertEqual(self._refs(name), 1)
+        self.assertTrue(self.storage.exists(name))
+        self.storage.delete(name)
+        self.assertIsNone(self._refs(name))
+        self.assertFalse(self.storage.exists(name))
+        # Uploaded again after its last delete, the blob is written anew.
+        self.assertEqual(self.storage.save("cv.pdf", ContentFile(b"shared")), name)
+        self.assertEqual((self._refs(name), self._files()), (1, [name]))
+
+    def test_files_saved_before_the_storage_are_deleted_outright(self):
+        legacy = FileSystemStorage(location=self.root).save("uploads/cv/old.pdf", ContentFile(b"old"))
+        self.storage.delete(legacy)
+        self.assertEqual(self._files(), [])
+
+    def test_deleting_an_analysis_releases_its_references_on_commit(self):
+        user = User.objects.create_user("storage-test")
+        with override_settings(MEDIA_ROOT=self.root):
+            analyses = []
+            for _ in range(2):
+                analysis = Analysis.objects.create(user=user, cv_text="cv", jd_text="jd")
+                analysis.cv_file.save("cv.pdf", ContentFile(b"one cv"), save=False)
+                analysis.jd_file.save("jd.pdf", ContentFile(b"one jd"), save=True)
+                analyses.append(analysis)
+            cv_blob, jd_blob = analyses[0].cv_file.name, analyses[0].jd_file.name
+            self.assertEqual((self._refs(cv_blob), self._refs(jd_blob)), (2, 2))
+
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                analyses[0].delete()
+                self.assertEqual(self._refs(cv_blob), 2)  # nothing is released until the delete commits
+            self.assertEqual(len(callbacks), 2)
+            self.assertEqual((self._refs(cv_blob), self._refs(jd_blob)), (1, 1))
+            self.assertEqual(self._files(), sorted([cv_blob, jd_blob]))
+
+            with self.captureOnCommitCallbacks(execute=True):
+                analyses[1].delete()
+            self.assertFalse(StoredBlob.objects.exists())
+            self.assertEqual(self._files(), [])
+
+
+class ImportDocumentsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("import-test")
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.source = Path(tmp.name) / "documents"
+        self.source.mkdir()
+        (self.source / "jd.txt").write_text("We need Python, Django and Kubernetes.")
+        for i in range(4):
+            (self.source / f"cv{i}.txt").write_text(f"CV {i}: Python and Django developer.")
+        # cv-missing.txt doesn't exist yet, so its pair fails.
+        self.manifest = Path(tmp.name) / "pairs.csv"
+        self.manifest.write_text("id,cv,jd,job_title\n" + "".join(
+            f"{name},{name}.txt,jd.txt,Role {name}\n" for name in ("cv0", "cv1", "cv-missing", "cv2", "cv3")
+        ))
+
+    def _import(self, *args, **options):
+        out = io.StringIO()
+        call_command("import_documents", str(self.source), str(self.manifest), *args, user="import-test",
+                     processes=1, stdout=out, **options)
+        return out.getvalue()
+
+    def _statuses(self):
+        return dict(Analysis.objects.filter(user=self.user).values_list("import_key", "status"))
+
+    def test_import_stores_results_and_failures(self):
+        self._import()
+        statuses = self._statuses()
+        self.assertEqual(statuses.pop("cv-missing"), AnalysisStatus.FAILED)
+        self.assertEqual(set(statuses.values()), {AnalysisStatus.DONE})
+        self.assertEqual(len(statuses), 4)
+        analysis = Analysis.objects.get(user=self.user, import_key="cv1")
+        self.assertEqual(analysis.job_title, "Role cv1")
+        self.assertIn("django", analysis.cv_skills)
+        self.assertIn("does not exist", Analysis.objects.get(import_key="cv-missing").error)
+
+    def test_rerun_skips_imported_pairs(self):
+        self._import()
+        out = self._import()
+        self.assertIn("5 already imported, 0 to go", out)
+        self.assertIn("1 of the imported pairs failed; pass --retry-failed", out)
+        self.assertEqual(Analysis.objects.filter(user=self.user).count(), 5)
+
+    def test_resume_after_a_crash_imports_the_rest_once(self):
+        written = []
+
+        def write_then_crash(user, batch):
+            if written:
+                raise RuntimeError("killed")
+            written.append(batch)
+            return _write_batch(user, batch)
+
+        with mock.patch("analyzer.importer._write_batch", write_then_crash), self.assertRaises(RuntimeError):
+            run_import(self.user, self.source, read_manifest(self.manifest), batch_size=2)
+        self.assertEqual(set(self._statuses()), {"cv0", "cv1"})
+        out = self._import(batch_size=2)
+        self.assertIn("2 already imported, 3 to go", out)
+        self.assertEqual(set(self._statuses()), {"cv0", "cv1", "cv-missing", "cv2", "cv3"})
+
+    def test_retry_failed_replaces_the_failed_analysis(self):
+        self._import()
+        failed = Analysis.objects.get(user=self.user, import_key="cv-missing")
+        # Still unreadable: retried, and replaced by a new failed analysis rather than duplicated.
+        self.assertIn("4 already imported, 1 to go", self._import("--retry-failed"))
+        self.assertEqual(Analysis.objects.filter(user=self.user, import_key="cv-missing").count(), 1)
+        self.assertFalse(Analysis.objects.filter(pk=failed.pk).exists())
+
+        (self.source / "cv-missing.txt").write_text("Kubernetes and Python engineer.")
+        self._import("--retry-failed")
+        self.assertEqual(set(self._statuses().values()), {AnalysisStatus.DONE})
+        self.assertEqual(Analysis.objects.filter(user=self.user).count(), 5)
+        self.assertIn("kubernetes", Analysis.objects.get(user=self.user, import_key="cv-missing").cv_skills)
+
+
+class RankDocumentsTests(SimpleTestCase):
+    def setUp(self):
+        taxonomy = nlp_utils.get_taxonomy()
+        self.query = synthetic_document(taxonomy, 2_000, seed=0)
+        self.candidates = [(f"jd-{i}", synthetic_document(taxonomy, 500, seed=i))
+                           for i in range(ranking.PARALLEL_THRESHOLD)]
+
+    def test_big_rankings_reuse_one_pool(self):
+        self.addCleanup(ranking._shutdown_executor)
+        with override_settings(RANKING_PROCESSES=0):
+            expected = ranking.rank_documents(self.query, self.candidates, top_k=20)
+            self.assertIsNone(ranking._executor)
+        with override_settings(RANKING_PROCESSES=2):
+            self.assertEqual(ranking.rank_documents(self.query, self.candidates, top_k=20), expected)
+            executor = ranking._executor
+            self.assertIsNotNone(executor)
+            self.assertEqual(ranking.rank_documents(self.query, self.candidates, top_k=20), expected)
+            self.assertIs(ranking._executor, executor)
+            # Small batches don't touch the pool.
+            ranking.rank_documents(self.query, self.candidates[:10])
+            self.assertIs(ranking._executor, executor)
@@ -4,8 +4,13 @@ from django.urls import path, reverse_lazy
 urlpatterns = [
     path("", views.home, name="home"),
     path("about/", views.about, name="about"),
+    path("metrics", views.metrics, name="metrics"),
+    path("rank/", views.rank, name="rank"),
+    path("search/", views.skill_search, name="skill_search"),
     path("analysis_history/", views.analysis_history, name="analysis_history"),
+    path("analysis_history/export/", views.analysis_export, name="analysis_export"),
     path("analysis/<int:pk>/", views.analysis_detail, name="analysis_detail"),
+    path("analysis/<int:pk>/status/", views.analysis_status, name="analysis_status"),
     path("analysis/<int:pk>/delete/", views.delete_analysis, name="analysis_delete"),
     # Auth
     path("login/", views.login_view, name="login"),
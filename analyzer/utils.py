@@ -1,23 +1,366 @@
 import io
+import asyncio
+import atexit
+import contextvars
+import hashlib
+import mmap
+import multiprocessing
+import os
+import re
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from xml.etree import ElementTree
+from xml.parsers import expat
+from django.conf import settings
+from django.core.cache import caches
 from pdfminer.high_level import extract_text as pdf_text
-from docx import Document
 from striprtf.striprtf import rtf_to_text
+from .metrics import CACHE_REQUESTS, EXTRACTION_FAILURES, UPLOAD_BYTES, stage
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Bump when extraction output changes so cached texts from older extractors are ignored.
+EXTRACTOR_VERSION = "2"
+EXTRACTED_TEXT_CACHE = "extracted_text"
+
+
+class ExtractionError(Exception):
+    """Raised when an uploaded document can't be turned into text; the message is shown to the user."""
+
+    def __init__(self, message: str, reason: str = "unreadable"):
+        super().__init__(message)
+        self.reason = reason
+
+
+def _limits() -> tuple[int, int]:
+    return settings.EXTRACTION_MAX_PAGES, settings.EXTRACTION_MAX_CHARS
+
+
+def _decode_source(source) -> str:
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return ""
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return str(mm, "utf-8", "ignore")
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return str(source, "utf-8", "ignore")
+    return str(source.read(), "utf-8", "ignore")
+
+
+_W = "http://schemas.openxmlformats.org/wordprocessingml/2006/main "
+_W_P, _W_R, _W_T = _W + "p", _W + "r", _W + "t"
+# Run children that stand for characters; w:tab elsewhere (paragraph tab stops) is formatting.
+_W_RUN_CHARS = {_W + "tab": "\t", _W + "br": "\n", _W + "cr": "\n", _W + "noBreakHyphen": "-"}
+# Text boxes are stored twice: as DrawingML in mc:Choice and as VML in mc:Fallback.
+_MC_FALLBACK = "http://schemas.openxmlformats.org/markup-compatibility/2006 Fallback"
+_DOCX_RELS = "_rels/.rels"
+_DOCX_MAIN_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+_DOCX_HEADER_RE = re.compile(r"word/header\d*\.xml")
+_DOCX_FOOTER_RE = re.compile(r"word/footer\d*\.xml")
+
+
+class _EnoughText(Exception):
+    pass
+
+
+class _DocxPartText:
+    """expat handlers collecting one line per w:p of a WordprocessingML part, in document order.
+
+    Table cells, text boxes and other nested paragraphs each become their own line.
+    """
+
+    def __init__(self, lines: list[str], max_chars: int):
+        self.lines, self.max_chars, self.size = lines, max_chars, 0
+        self.paragraphs: list[list[str]] = []
+        self.runs: list[int] = []  # open w:r depth per open paragraph
+        self.in_text = False
+        self.skipping = 0
+
+    def start(self, name, attrs):
+        if self.skipping:
+            self.skipping += name == _MC_FALLBACK
+        elif name == _MC_FALLBACK:
+            self.skipping = 1
+        elif name == _W_P:
+            self.paragraphs.append([])
+            self.runs.append(0)
+        elif not self.paragraphs:
+            return
+        elif name == _W_R:
+            self.runs[-1] += 1
+        elif self.runs[-1]:
+            if name == _W_T:
+                self.in_text = True
+            elif name in _W_RUN_CHARS:
+                self.paragraphs[-1].append(_W_RUN_CHARS[name])
+
+    def end(self, name):
+        if self.skipping:
+            self.skipping -= name == _MC_FALLBACK
+        elif name == _W_T:
+            self.in_text = False
+        elif name == _W_R and self.runs:
+            self.runs[-1] -= 1
+        elif name == _W_P and self.paragraphs:
+            self.runs.pop()
+            line = "".join(self.paragraphs.pop())
+            self.lines.append(line)
+            self.size += len(line) + 1
+            if self.max_chars and self.size >= self.max_chars:
+                raise _EnoughText
+
+    def data(self, text):
+        if self.in_text and not self.skipping:
+            self.paragraphs[-1].append(text)
+
+
+def _docx_part_lines(archive: zipfile.ZipFile, part: str, max_chars: int) -> list[str]:
+    lines: list[str] = []
+    handler = _DocxPartText(lines, max_chars)
+    parser = expat.ParserCreate(namespace_separator=" ")
+    parser.buffer_text = True
+    parser.buffer_size = 64 * 1024
+    parser.StartElementHandler = handler.start
+    parser.EndElementHandler = handler.end
+    parser.CharacterDataHandler = handler.data
+    with archive.open(part) as stream:
+        try:
+            parser.ParseFile(stream)
+        except _EnoughText:
+            pass
+    return lines
+
+
+def _docx_main_part(archive: zipfile.ZipFile) -> str:
+    try:
+        rels = ElementTree.fromstring(archive.read(_DOCX_RELS))
+    except KeyError:
+        return "word/document.xml"
+    for rel in rels:
+        if rel.get("Type") == _DOCX_MAIN_REL:
+            return rel.get("Target", "").lstrip("/")
+    return "word/document.xml"
+
+
+def _docx_text(source, max_chars: int = 0) -> str:
+    """Text of the headers, body (including tables and text boxes) and footers of a .docx.
+
+    The XML is streamed out of the zip through expat, so memory doesn't grow with the document.
+    """
+    with zipfile.ZipFile(source) as archive:
+        names = archive.namelist()
+        headers = sorted((n for n in names if _DOCX_HEADER_RE.fullmatch(n)), key=lambda n: (len(n), n))
+        footers = sorted((n for n in names if _DOCX_FOOTER_RE.fullmatch(n)), key=lambda n: (len(n), n))
+        main = _docx_main_part(archive)
+        parts, seen, size = [], set(), 0
+        for part in headers + [main] + footers:
+            text = "\n".join(_docx_part_lines(archive, part, max_chars and max_chars - size))
+            if part != main:
+                # First-page, even and default headers usually repeat each other.
+                if not text.strip() or text in seen:
+                    continue
+                seen.add(text)
+            parts.append(text)
+            size += len(text) + 1
+            if max_chars and size >= max_chars:
+                break
+    return "\n".join(parts)
+
+
+def _extract_source(name: str, source, max_pages: int = 0, max_chars: int = 0) -> str:
+    # source is a filesystem path, a bytes-like object or an open binary file.
+    if isinstance(source, (bytes, bytearray, memoryview)) and name.endswith((".pdf", ".docx")):
+        source = io.BytesIO(source)
+
+    if name.endswith(".pdf"):
+        text = pdf_text(source, maxpages=max_pages)
+
+    elif name.endswith(".docx"):
+        text = _docx_text(source, max_chars)
+
+    elif name.endswith(".rtf"):
+        text = rtf_to_text(_decode_source(source))
+
+    else:
+        text = _decode_source(source)
+
+    return text[:max_chars] if max_chars else text
+
+
+def _limit_worker_memory(max_memory_mb: int):
+    if resource is not None and max_memory_mb:
+        limit = max_memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+_pool = None
+_pool_generation = 0
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = multiprocessing.Pool(
+                processes=settings.EXTRACTION_POOL_SIZE,
+                initializer=_limit_worker_memory,
+                initargs=(settings.EXTRACTION_MAX_MEMORY_MB,),
+                maxtasksperchild=100,
+            )
+        return _pool, _pool_generation
+
+
+def _reset_pool(generation: int):
+    global _pool, _pool_generation
+    with _pool_lock:
+        if _pool is not None and generation == _pool_generation:
+            _pool.terminate()
+            _pool = None
+            _pool_generation += 1
+
+
+@atexit.register
+def _shutdown_pool():
+    _reset_pool(_pool_generation)
+
+
+_UNREADABLE = "We couldn't read this file. Is it a valid PDF, DOCX, RTF or text document?"
+
+
+def _run_in_pool(func, args: tuple, timeout: float):
+    # A hung parser can only be stopped by killing its process, so a timeout tears the pool down.
+    # Jobs of other requests that were in the same pool notice the new generation and resubmit.
+    deadline = time.monotonic() + timeout
+    while True:
+        pool, generation = _get_pool()
+        result = pool.apply_async(func, args)
+        while not result.ready():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                _reset_pool(generation)
+                raise ExtractionError("This file took too long to process. Try a smaller or simpler document.", "timeout")
+            if generation != _pool_generation:
+                break
+            result.wait(min(0.25, remaining))
+        if result.ready():
+            try:
+                return result.get()
+            except ExtractionError:
+                raise
+            except MemoryError as exc:
+                raise ExtractionError("This file is too large to process.", "too_large") from exc
+            except Exception as exc:
+                # Raised by the parser in the child: the file, not the pool, is the problem. Failures to
+                # start or reach the pool propagate as they are, so the job is retried rather than failed.
+                raise ExtractionError(_UNREADABLE) from exc
+
+
+def _local_path(uploaded_file) -> str | None:
+    temporary_file_path = getattr(uploaded_file, "temporary_file_path", None)
+    if temporary_file_path is not None:
+        return temporary_file_path()
+    try:
+        path = uploaded_file.path
+    except (AttributeError, NotImplementedError, ValueError):
+        return None
+    return path if isinstance(path, str) and os.path.exists(path) else None
+
+
+def _content_digest(uploaded_file) -> str:
+    # Kept on the file, so storing an upload after extracting it doesn't hash it again.
+    digest = getattr(uploaded_file, "content_digest", None)
+    if digest is not None:
+        return digest
+    h = hashlib.sha256()
+    getbuffer = getattr(getattr(uploaded_file, "file", None), "getbuffer", None)
+    if getbuffer is not None:
+        h.update(getbuffer())
+    else:
+        for chunk in uploaded_file.chunks():
+            h.update(chunk)
+    uploaded_file.seek(0)
+    uploaded_file.content_digest = h.hexdigest()
+    return uploaded_file.content_digest
+
+
+def _extract_limited(name: str, uploaded_file) -> str:
+    # Spooled uploads are read straight from their temp file; nothing is copied into this process.
+    max_pages, max_chars = _limits()
+    path = _local_path(uploaded_file)
+    # A daemonic process (e.g. a multiprocessing.Pool worker) may not start the pool's children, so
+    # it extracts in-process, without the timeout.
+    if (not name.endswith((".pdf", ".docx", ".rtf")) or not settings.EXTRACTION_POOL_SIZE
+            or multiprocessing.current_process().daemon):
+        try:
+            return _extract_source(name, path or uploaded_file, max_pages, max_chars)
+        except Exception as exc:
+            raise ExtractionError(_UNREADABLE) from exc
+        finally:
+            uploaded_file.seek(0)
+    source = path
+    if source is None:
+        source = uploaded_file.read()
+        uploaded_file.seek(0)
+    return _run_in_pool(_extract_source, (name, source, max_pages, max_chars), settings.EXTRACTION_TIMEOUT)
+
+
+def _document_kind(name: str) -> str:
+    return name.rsplit(".", 1)[-1] if name.endswith((".pdf", ".docx", ".rtf")) else "txt"
+
+
+def extracted_text_cache_key(name: str, digest: str) -> str:
+    kind = _document_kind(name)
+    max_pages, max_chars = _limits()
+    return f"extract:{EXTRACTOR_VERSION}:{kind}:{max_pages}:{max_chars}:{digest}"
 
 
 def extract_text_any(uploaded_file) -> str:
     name = (uploaded_file.name or "").lower()
-    data = uploaded_file.read()
-    uploaded_file.seek(0)
 
-    if name.endswith(".pdf"):
-        return pdf_text(io.BytesIO(data))
+    kind = _document_kind(name)
+    UPLOAD_BYTES.observe(uploaded_file.size or 0, format=kind)
+
+    cache = caches[EXTRACTED_TEXT_CACHE]
+    with stage("extract_cache"):
+        key = extracted_text_cache_key(name, _content_digest(uploaded_file))
+        text = cache.get(key)
+    CACHE_REQUESTS.inc(cache=EXTRACTED_TEXT_CACHE, result="miss" if text is None else "hit")
+    if text is None:
+        try:
+            with stage("extract", format=kind):
+                text = _extract_limited(name, uploaded_file)
+        except ExtractionError as exc:
+            EXTRACTION_FAILURES.inc(format=kind, reason=exc.reason)
+            raise
+        cache.set(key, text)
+    return text
+
+
+_thread_executor = None
+_thread_executor_lock = threading.Lock()
+
+
+def _get_thread_executor() -> ThreadPoolExecutor:
+    global _thread_executor
+    with _thread_executor_lock:
+        if _thread_executor is None:
+            _thread_executor = ThreadPoolExecutor(max_workers=settings.EXTRACTION_THREADS, thread_name_prefix="extract")
+        return _thread_executor
+
 
-    if name.endswith(".docx"):
-        doc = Document(io.BytesIO(data))
-        return "\n".join(p.text for p in doc.paragraphs)
+async def run_blocking(func, *args):
+    """Await ``func(*args)`` on the bounded extraction threads, keeping the caller's contextvars
+    (request stage timings)."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_thread_executor(), contextvars.copy_context().run, func, *args)
 
-    if name.endswith(".rtf"):
-        raw = data.decode("utf-8", errors="ignore")
-        return rtf_to_text(raw)
 
-    return data.decode("utf-8", errors="ignore")
+async def aextract_text_any(uploaded_file) -> str:
+    return await run_blocking(extract_text_any, uploaded_file)
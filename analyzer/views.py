@@ -1,11 +1,30 @@
-from django.shortcuts import render, redirect, get_object_or_404
+import asyncio
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import HttpResponse
-from .forms import AnalyzeUploadForm
-from .utils import extract_text_any
-from .models import Analysis
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from django.urls import reverse
+from django.core.cache import caches
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.utils.safestring import mark_safe
+from .forms import AnalyzeUploadForm, RankForm
+from .utils import ExtractionError, aextract_text_any, extract_text_any, run_blocking
+from .models import Analysis, AnalysisStatus, DocumentSkill
 from .nlp_utils import analyze_texts
+from . import nlp_utils
+from .jobs import enqueue_analysis
+from .ranking import rank_documents
+from .skill_search import parse_skills, search_analyses
+from .history import history_page
+from .export import FORMATS as EXPORT_FORMATS, aiterate, export_chunks, export_queryset
+from . import metrics as analyzer_metrics
 from django.contrib.auth import login, logout
 from .forms import CustomRegisterForm, CustomLoginForm
 from django.contrib.auth import get_user_model
@@ -41,6 +60,11 @@ _CATEGORY_LABELS = {
     "project_methodologies": "Project Methodologies",
 }
 
+RESULT_FRAGMENT_CACHE = "result_fragments"
+# Bump when result-details.html or category-table.html change, so cached pages and fragments are re-rendered.
+RESULT_PAGE_VERSION = "2"
+
+
 def pretty_category(cat_key: str) -> str:
     if not cat_key:
         return ""
@@ -67,10 +91,94 @@ def pretty_category(cat_key: str) -> str:
     return pretty
 
 
+def _extract_for_field(form, field: str, uploaded_file) -> str:
+    try:
+        return extract_text_any(uploaded_file)
+    except ExtractionError as exc:
+        form.add_error(field, str(exc))
+        raise
+
+
+async def _extract_fields(form, uploads: dict) -> dict | None:
+    """Extract the uploads concurrently; returns {field: text}, or None after adding form errors."""
+    fields = list(uploads)
+    outcomes = await asyncio.gather(*(aextract_text_any(uploads[f]) for f in fields), return_exceptions=True)
+    texts = {}
+    for field, outcome in zip(fields, outcomes):
+        if isinstance(outcome, ExtractionError):
+            form.add_error(field, str(outcome))
+        elif isinstance(outcome, BaseException):
+            raise outcome
+        else:
+            texts[field] = outcome
+    return None if form.errors else texts
+
+
+def _result_version(analysis) -> str:
+    """Identifies what a finished analysis page shows; it's both the ETag and the fragment cache key.
+
+    A stored analysis only changes when it's re-analysed (which moves ``updated_at``) or when the
+    analyzer or taxonomy version changes; RESULT_PAGE_VERSION covers changes to the templates.
+    """
+    return (f"{analysis.pk}-{RESULT_PAGE_VERSION}-{nlp_utils.RESULTS_VERSION}-"
+            f"{analysis.updated_at.timestamp():.6f}")
+
+
+def _with_validators(response, analysis):
+    response["ETag"] = f'"{_result_version(analysis)}"'
+    response["Last-Modified"] = http_date(analysis.updated_at.timestamp())
+    # Per-user page: browsers may keep it but must revalidate, shared caches must not store it.
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def _category_rows(results: dict) -> list[dict]:
+    table_rows = []
+    cat_scores = results.get("category_scores", {})
+    mbc = results.get("matched_by_category", {})
+    mibc = results.get("missing_by_category", {})
+    xbc = results.get("extra_by_category", {})
+
+    all_keys = set(cat_scores) | set(mbc) | set(mibc) | set(xbc)
+    for cat_key in sorted(all_keys):
+        score = cat_scores.get(cat_key, 0.0)
+        table_rows.append({
+            "cat_key": cat_key,
+            "cat_pretty": pretty_category(cat_key),
+            "score": score,
+            "matched": ", ".join(mbc.get(cat_key, [])),
+            "missing": ", ".join(mibc.get(cat_key, [])),
+            "extra": ", ".join(xbc.get(cat_key, [])),
+        })
+    return table_rows
+
+
+def _category_table(version: str, results: dict) -> str:
+    cache = caches[RESULT_FRAGMENT_CACHE]
+    key = f"category-table:{version}"
+    html = cache.get(key)
+    analyzer_metrics.CACHE_REQUESTS.inc(cache=RESULT_FRAGMENT_CACHE, result="miss" if html is None else "hit")
+    if html is None:
+        html = render_to_string("analyzer/category-table.html", {"table_rows": _category_rows(results)})
+        cache.set(key, html)
+    return mark_safe(html)
+
+
+def _bound_upload_form(request):
+    # Reading request.FILES parses the multipart body, which may spool to disk.
+    form = AnalyzeUploadForm(request.POST, request.FILES)
+    form.is_valid()
+    return form
+
+
+async def _arender(request, template_name: str, context: dict):
+    return await sync_to_async(render)(request, template_name, context)
+
+
 @login_required
-def home(request):
+async def home(request):
     if request.method == "POST":
-        form = AnalyzeUploadForm(request.POST, request.FILES)
+        form = await sync_to_async(_bound_upload_form)(request)
         if form.is_valid():
             cv_file = form.cleaned_data.get("cv")
             jd_file = form.cleaned_data.get("jd")
@@ -79,70 +187,206 @@ def home(request):
 
             job_title = form.cleaned_data.get("job_title") or ""
             company = form.cleaned_data.get("company") or ""
-
-
+            user = await request.auser()
+
+            if settings.ANALYSIS_BACKGROUND_JOBS:
+                analysis = await Analysis.objects.acreate(
+                    user=user,
+                    job_title=job_title,
+                    company=company,
+                    cv_file=cv_file,
+                    jd_file=jd_file,
+                    cv_filename=cv_file.name if cv_file else "",
+                    jd_filename=jd_file.name if jd_file else "",
+                    cv_text=cv_text or "",
+                    jd_text=jd_text or "",
+                    status=AnalysisStatus.PENDING,
+                )
+                await sync_to_async(enqueue_analysis)(analysis)
+                return redirect("analysis_detail", pk=analysis.pk)
+
+            uploads = {}
             if not cv_text and cv_file:
-                cv_text = extract_text_any(cv_file)
+                uploads["cv"] = cv_file
             if not jd_text and jd_file:
-                jd_text = extract_text_any(jd_file)
-
-            if cv_file:
-                cv_file.seek(0)
-            if jd_file:
-                jd_file.seek(0)
+                uploads["jd"] = jd_file
+            texts = await _extract_fields(form, uploads)
+            if texts is None:
+                return await _arender(request, "analyzer/analyse.html", {"form": form})
+            cv_text = texts.get("cv", cv_text)
+            jd_text = texts.get("jd", jd_text)
 
+            results = await run_blocking(analyze_texts, cv_text, jd_text)
 
-            results = analyze_texts(cv_text, jd_text)
-
-            analysis = Analysis.objects.create(
-                user=request.user,
+            analysis = Analysis(
+                user=user,
                 job_title=job_title,
                 company=company,
                 cv_file=cv_file,
                 jd_file=jd_file,
+                cv_filename=cv_file.name if cv_file else "",
+                jd_filename=jd_file.name if jd_file else "",
                 cv_text=cv_text,
                 jd_text=jd_text,
-                match_percent=results["match_percent"],
-                cv_keywords=results["cv_keywords"],
-                jd_keywords=results["jd_keywords"],
             )
+            analysis.set_results(results)
+            with analyzer_metrics.stage("db"):
+                await analysis.asave()
 
             return redirect("analysis_detail", pk=analysis.pk)
         else:
-            return render(request, "analyzer/analyse.html", {"form": form})
+            return await _arender(request, "analyzer/analyse.html", {"form": form})
+
+    return await _arender(request, "analyzer/analyse.html", {"form": AnalyzeUploadForm()})
 
-    return render(request, "analyzer/analyse.html", {"form": AnalyzeUploadForm()})
+def metrics(request):
+    if not analyzer_metrics.enabled():
+        raise Http404
+    token = settings.METRICS_TOKEN
+    authorization = request.headers.get("Authorization", "")
+    if not (request.user.is_staff or (token and constant_time_compare(authorization, f"Bearer {token}"))):
+        return HttpResponseForbidden()
+    return HttpResponse(analyzer_metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
 
 @login_required
-def analysis_history(request):
-    analyses = Analysis.objects.filter(user=request.user).order_by("-created_at")
-    return render(request, "analyzer/analysis-history.html", {"analyses": analyses})
+def rank(request):
+    wants_json = request.GET.get("format") == "json"
+    if request.method != "POST":
+        return render(request, "analyzer/rank.html", {"form": RankForm()})
+
+    form = RankForm(request.POST, request.FILES)
+    if not form.is_valid():
+        if wants_json:
+            return JsonResponse({"errors": form.errors.get_json_data()}, status=400)
+        return render(request, "analyzer/rank.html", {"form": form})
+
+    query_is_cv = form.cleaned_data["mode"] == RankForm.MODE_CV
+    query_text = form.cleaned_data["query_text"]
+    try:
+        if not query_text:
+            query_text = _extract_for_field(form, "query", form.cleaned_data["query"])
+    except ExtractionError:
+        if wants_json:
+            return JsonResponse({"errors": form.errors.get_json_data()}, status=400)
+        return render(request, "analyzer/rank.html", {"form": form})
+
+    candidates, skipped = [], []
+    for uploaded in form.cleaned_data["candidates"]:
+        try:
+            candidates.append((uploaded.name, extract_text_any(uploaded)))
+        except ExtractionError:
+            skipped.append(uploaded.name)
+
+    rows = rank_documents(query_text, candidates, query_is_cv=query_is_cv, top_k=form.cleaned_data["top_k"])
+    if wants_json:
+        return JsonResponse({"results": rows, "skipped": skipped, "ranked": len(candidates)})
+    return render(request, "analyzer/rank.html", {
+        "form": form,
+        "rows": rows,
+        "skipped": skipped,
+        "ranked": len(candidates),
+        "query_is_cv": query_is_cv,
+    })
 
 
 @login_required
-def analysis_detail(request, pk):
-    analysis = get_object_or_404(Analysis, pk=pk, user=request.user)
-    results = analyze_texts(analysis.cv_text, analysis.jd_text)
+def skill_search(request):
+    kind = request.GET.get("doc", DocumentSkill.KIND_CV)
+    if kind not in (DocumentSkill.KIND_CV, DocumentSkill.KIND_JD):
+        kind = DocumentSkill.KIND_CV
+    all_skills = parse_skills(request.GET.get("all", ""))
+    any_skills = parse_skills(request.GET.get("any", ""))
+    none_skills = parse_skills(request.GET.get("none", ""))
+    try:
+        cursor = int(request.GET.get("cursor") or 0) or None
+    except ValueError:
+        cursor = None
+
+    searched = bool(all_skills or any_skills or none_skills)
+    analyses, next_cursor = [], None
+    if searched:
+        analyses, next_cursor = search_analyses(
+            request.user, kind, all_skills, any_skills, none_skills, cursor=cursor,
+        )
+
+    if request.GET.get("format") == "json":
+        return JsonResponse({
+            "results": [
+                {
+                    "id": a.pk,
+                    "job_title": a.job_title,
+                    "company": a.company,
+                    "created_at": a.created_at.isoformat(),
+                    "match_percent": a.match_percent,
+                    "skills": getattr(a, f"{kind}_skills"),
+                }
+                for a in analyses
+            ],
+            "next_cursor": next_cursor,
+        })
 
+    query = request.GET.copy()
+    query.pop("cursor", None)
+    return render(request, "analyzer/skill-search.html", {
+        "analyses": analyses,
+        "searched": searched,
+        "doc": kind,
+        "all": request.GET.get("all", ""),
+        "any": request.GET.get("any", ""),
+        "none": request.GET.get("none", ""),
+        "next_cursor": next_cursor,
+        "query_string": query.urlencode(),
+    })
 
-    table_rows = []
-    cat_scores = results.get("category_scores", {})
-    mbc = results.get("matched_by_category", {})
-    mibc = results.get("missing_by_category", {})
-    xbc = results.get("extra_by_category", {})
 
+@login_required
+def analysis_history(request):
+    cursor = request.GET.get("cursor")
+    analyses, next_cursor = history_page(request.user, cursor)
+    context = {"analyses": analyses, "next_cursor": next_cursor}
+    if request.headers.get("HX-Request") == "true":
+        return render(request, "analyzer/analysis-history-rows.html", context)
+    if not cursor:
+        context["total"] = Analysis.objects.filter(user=request.user).count()
+    return render(request, "analyzer/analysis-history.html", context)
 
-    all_keys = set(cat_scores) | set(mbc) | set(mibc) | set(xbc)
-    for cat_key in sorted(all_keys):
-        score = cat_scores.get(cat_key, 0.0)
-        table_rows.append({
-            "cat_key": cat_key,
-            "cat_pretty": pretty_category(cat_key),
-            "score": score,
-            "matched": ", ".join(mbc.get(cat_key, [])),
-            "missing": ", ".join(mibc.get(cat_key, [])),
-            "extra": ", ".join(xbc.get(cat_key, [])),
-        })
+
+@login_required
+def analysis_export(request):
+    fmt = request.GET.get("format", "csv")
+    if fmt not in EXPORT_FORMATS:
+        fmt = "csv"
+    compress = request.GET.get("gzip") in ("1", "true")
+    chunks = export_chunks(export_queryset(request.user), fmt, compress)
+    # Under ASGI a plain generator would be read into memory before the first byte goes out.
+    if isinstance(request, ASGIRequest):
+        chunks = aiterate(chunks)
+
+    filename = f"analyses-{timezone.localdate():%Y%m%d}.{fmt}" + (".gz" if compress else "")
+    content_type = "application/gzip" if compress else (
+        "text/csv; charset=utf-8" if fmt == "csv" else "application/x-ndjson; charset=utf-8"
+    )
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+@login_required
+async def analysis_detail(request, pk):
+    user = await request.auser()
+    # Revalidation only reads the validator columns, never the documents or the results.
+    head = await aget_object_or_404(Analysis.objects.only("status", "updated_at", "results_version"), pk=pk, user=user)
+    if head.status == AnalysisStatus.DONE and head.results_version == nlp_utils.RESULTS_VERSION:
+        not_modified = get_conditional_response(request, etag=f'"{_result_version(head)}"',
+                                                last_modified=int(head.updated_at.timestamp()))
+        if not_modified is not None:
+            return _with_validators(not_modified, head)
+
+    analysis = await aget_object_or_404(Analysis, pk=pk, user=user)
+    if analysis.status != AnalysisStatus.DONE:
+        return await _arender(request, "analyzer/analysis-pending.html", {"analysis": analysis})
+    # May recompute stale results, which moves updated_at, so the version is taken afterwards.
+    results = await sync_to_async(analysis.get_results)()
 
     context = {
         "analysis": analysis,
@@ -154,11 +398,27 @@ def analysis_detail(request, pk):
         "matched_keywords": results.get("matched_keywords", []),
         "missing_keywords": results.get("missing_keywords", []),
         "extra_keywords": results.get("extra_keywords", []),
-        "table_rows": table_rows,
+        "category_table": await sync_to_async(_category_table)(_result_version(analysis), results),
 
         "evidence": results.get("evidence", {}),
+        "fuzzy_matches": [
+            {**match, "doc": doc}
+            for doc, key in (("CV", "cv_fuzzy_matches"), ("Job Ad", "jd_fuzzy_matches"))
+            for match in results.get(key, [])
+        ],
     }
-    return render(request, "analyzer/result-details.html", context)
+    response = await _arender(request, "analyzer/result-details.html", context)
+    return _with_validators(response, analysis)
+
+
+@login_required
+def analysis_status(request, pk):
+    analysis = get_object_or_404(Analysis.objects.only("pk", "status", "error"), pk=pk, user=request.user)
+    if analysis.status == AnalysisStatus.DONE:
+        response = HttpResponse("")
+        response["HX-Redirect"] = reverse("analysis_detail", args=[analysis.pk])
+        return response
+    return render(request, "analyzer/analysis-status.html", {"analysis": analysis})
 
 
 @login_required
@@ -47,8 +47,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'analyzer.metrics.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'cv_checker.middleware.AsyncWhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -94,6 +95,47 @@ DATABASES = {"default":{
 db_from_env = dj_database_url.config(conn_max_age=600, ssl_require=True)
 if db_from_env:
     DATABASES['default'] = db_from_env
+
+# Caches
+# Extracted upload text is keyed by file hash, so the cache is shared on disk between workers.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "extracted_text": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.getenv("EXTRACTED_TEXT_CACHE_DIR", str(BASE_DIR / "cache" / "extracted_text")),
+        "TIMEOUT": 60 * 60 * 24 * 30,
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.getenv("EXTRACTED_TEXT_CACHE_MAX_ENTRIES", "5000")),
+            "CULL_FREQUENCY": 4,
+        },
+    },
+    # Analysed document profiles shared by all workers; see DOCUMENT_PROFILE_CACHE_SIZE for the per-process tier.
+    "document_profiles": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.getenv("DOCUMENT_PROFILE_CACHE_DIR", str(BASE_DIR / "cache" / "document_profiles")),
+        "TIMEOUT": 60 * 60 * 24 * 7,
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.getenv("DOCUMENT_PROFILE_CACHE_MAX_ENTRIES", "20000")),
+            "CULL_FREQUENCY": 4,
+        },
+    },
+    # Rendered result-page fragments, keyed on the analysis and the versions they were rendered with.
+    "result_fragments": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.getenv("RESULT_FRAGMENT_CACHE_DIR", str(BASE_DIR / "cache" / "result_fragments")),
+        "TIMEOUT": 60 * 60 * 24 * 7,
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.getenv("RESULT_FRAGMENT_CACHE_MAX_ENTRIES", "10000")),
+            "CULL_FREQUENCY": 4,
+        },
+    },
+}
+
+# Profiles kept in memory per process, in front of the "document_profiles" cache; 0 turns the tier off.
+DOCUMENT_PROFILE_CACHE_SIZE = int(os.getenv("DOCUMENT_PROFILE_CACHE_SIZE", "256"))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -135,8 +177,9 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 
 # WhiteNoise storages: hashed filenames + long-cache headers
 STORAGES = {
+    # Uploads are stored once per content hash and shared between analyses.
     "default": {
-        "BACKEND": "django.core.files.storage.FileSystemStorage",
+        "BACKEND": "analyzer.storage.ContentAddressedStorage",
     },
     "staticfiles": {
         "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
@@ -156,6 +199,38 @@ LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'home'
 LOGOUT_REDIRECT_URL = 'login'
 
+# Analyzer
+# Language detection only matters for non-English CVs; English-only deployments can switch it off.
+ANALYZER_DETECT_LANGUAGE = os.getenv("ANALYZER_DETECT_LANGUAGE", "True").lower() == "true"
+# Per-stage timings in a Server-Timing header and Prometheus histograms at /metrics
+# (staff users, or `Authorization: Bearer $METRICS_TOKEN`). Metrics are kept per process.
+ANALYZER_METRICS = os.getenv("ANALYZER_METRICS", "False").lower() == "true"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+# Compiled by `manage.py compile_taxonomy`; when present it is loaded instead of the JSON configs,
+# and a recompiled file is picked up by running workers within TAXONOMY_RELOAD_INTERVAL seconds.
+TAXONOMY_ARTIFACT = os.getenv("TAXONOMY_ARTIFACT", str(BASE_DIR / "cache" / "taxonomy.pickle"))
+TAXONOMY_RELOAD_INTERVAL = float(os.getenv("TAXONOMY_RELOAD_INTERVAL", "5"))
+# When enabled, uploads are queued and processed by `manage.py analysis_worker`.
+ANALYSIS_BACKGROUND_JOBS = os.getenv("ANALYSIS_BACKGROUND_JOBS", "False").lower() == "true"
+
+# Document extraction runs in a process pool so a bad PDF can't hang or bloat a web worker.
+# EXTRACTION_POOL_SIZE=0 extracts in-process (no timeout).
+EXTRACTION_POOL_SIZE = int(os.getenv("EXTRACTION_POOL_SIZE", "2"))
+EXTRACTION_TIMEOUT = float(os.getenv("EXTRACTION_TIMEOUT", "20"))
+EXTRACTION_MAX_PAGES = int(os.getenv("EXTRACTION_MAX_PAGES", "50"))
+EXTRACTION_MAX_CHARS = int(os.getenv("EXTRACTION_MAX_CHARS", "200000"))
+EXTRACTION_MAX_MEMORY_MB = int(os.getenv("EXTRACTION_MAX_MEMORY_MB", "0"))
+# Threads the async views use to wait on extraction and run the analysis (CV and JD in parallel).
+EXTRACTION_THREADS = int(os.getenv("EXTRACTION_THREADS", "4"))
+
+# Uploads above this size are spooled to a temp file and extracted from disk.
+FILE_UPLOAD_MAX_MEMORY_SIZE = int(os.getenv("FILE_UPLOAD_MAX_MEMORY_SIZE", str(1024 * 1024)))
+FILE_UPLOAD_TEMP_DIR = os.getenv("FILE_UPLOAD_TEMP_DIR") or None
+# Processes each web worker keeps for scoring big rankings; started on first use. 0 or 1 ranks in-process.
+RANKING_PROCESSES = int(os.getenv("RANKING_PROCESSES", "2"))
+# The ranking page accepts many candidate documents in one upload.
+DATA_UPLOAD_MAX_NUMBER_FILES = int(os.getenv("DATA_UPLOAD_MAX_NUMBER_FILES", "1000"))
+
 # Email backend for dev
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 DEFAULT_FROM_EMAIL = "CV Checker <no-reply@cvchecker.app>"